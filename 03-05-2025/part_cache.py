@@ -0,0 +1,75 @@
+import json
+import sqlite3
+import time
+
+
+class PartCache:
+    """Compatibility rows per part number, kept in a small SQLite file.
+
+    Rows are stored as JSON with the time they were looked up. Entries older
+    than ttl seconds are stale and looked up again; parts the site returned
+    nothing for expire after the shorter empty_ttl, since an empty result is
+    as likely to be a slow page as a part without compatibility data.
+    """
+
+    def __init__(self, path, ttl=30 * 86400, empty_ttl=86400):
+        self.path = path
+        self.ttl = ttl
+        self.empty_ttl = empty_ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS parts ("
+            " part_number TEXT PRIMARY KEY,"
+            " rows TEXT NOT NULL,"
+            " row_count INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, part_number):
+        """Cached rows for part_number, or None if it was never looked up or is stale"""
+        row = self.conn.execute(
+            "SELECT rows, row_count, fetched_at FROM parts WHERE part_number = ?", (part_number,)
+        ).fetchone()
+        if row is None:
+            return None
+        rows, row_count, fetched_at = row
+        ttl = self.ttl if row_count else self.empty_ttl
+        if time.time() - fetched_at > ttl:
+            return None
+        return json.loads(rows)
+
+    def put(self, part_number, rows):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO parts (part_number, rows, row_count, fetched_at) VALUES (?, ?, ?, ?)",
+            (part_number, json.dumps(rows, ensure_ascii=False), len(rows), time.time()),
+        )
+        # commit per part so an interrupted sheet keeps everything looked up so far
+        self.conn.commit()
+
+    def split(self, part_numbers, refresh=False, searched=()):
+        """({part number: cached rows}, [part numbers to look up]) for a sheet, each part once.
+
+        refresh ignores cached rows, except for parts already in searched
+        (the ones looked up earlier in this run), which are never returned
+        for another lookup.
+        """
+        cached = {}
+        missing = []
+        for part_number in dict.fromkeys(part_numbers):
+            rows = None if refresh and part_number not in searched else self.get(part_number)
+            if rows is not None:
+                cached[part_number] = rows
+            elif part_number not in searched:
+                missing.append(part_number)
+        return cached, missing
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,12 +1,26 @@
+import argparse
+import csv
 import os
+import sys
 import time
-import pandas as pd
-from bs4 import BeautifulSoup
+from functools import partial
+from urllib.parse import quote
+
+from openpyxl import Workbook, load_workbook
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.cli import readiness_args
+from common.parsers import Targets, parse_html
+from common.readiness import Readiness
+from common.selenium_pool import run_with_drivers
+from part_cache import PartCache
+
+# one headless Chrome per worker process
+WORKERS = os.cpu_count() or 2
 
 def initialize_browser():
     chrome_options = Options()
@@ -15,132 +29,312 @@ def initialize_browser():
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+    # don't wait for every image and script, HOME_READY/RESULTS_READY wait for what we need
+    chrome_options.page_load_strategy = "eager"
     return webdriver.Chrome(options=chrome_options)
 
-def extract_part_details(driver, part_number):
+# search results URL, {query} is the URL-quoted part number
+SEARCH_URL = "https://boodmo.com/search/{query}/"
+
+# direct lookups that have to fall back to the form before a worker stops trying them
+DIRECT_MISSES = 3
+
+COLUMNS = ['Part Number', 'Product Name', 'Brand Name', 'Pincode', 'Price', 'Model', 'Year',
+           'Engine', 'Power (hp)', 'Fuel Type', 'Engine Type']
+
+PART_TARGETS = Targets(
+    "div.compatibility-list__item",
+    "h2.part-info-heading",
+    "a.part-info-top__brand",
+    "span.part-info-price__mrp",
+)
+
+# the search form, and the compatibility rows once they stop being added (at most 2s after the first);
+# the rows arrive by XHR into an idle page, so a quiet page isn't done until they show up or time runs out
+HOME_READY = Readiness(["form.search-form"], timeout=10, name="home", required=True)
+RESULTS_READY = Readiness([".compatibility-list__item"], timeout=15, quiet=0.5, settle=2, name="results",
+                          required=True)
+
+_direct_misses = 0
+
+def parse_part_details(html, part_number):
+    """Compatibility rows of a Boodmo part page"""
     part_details = []
+    doc = parse_html(html, only=PART_TARGETS)
+    items = doc.select('div.compatibility-list__item')
+
+    product_name_tag = doc.select_one('h2.part-info-heading')
+    product_name = product_name_tag.text().strip() if product_name_tag else 'N/A'
+
+    brand_anchor = doc.select_one('a.part-info-top__brand')
+    brand_img = brand_anchor.select_one('img.lazy-load-images__image') if brand_anchor else None
+    brand_name = brand_img.get('alt').strip() if brand_img and brand_img.has_attr('alt') else 'N/A'
+
+    price_tag = doc.select_one('span.part-info-price__mrp')
+    price = price_tag.text().strip() if price_tag else 'N/A'
+
+    pin = '122003'  # Default pincode
+
+    for item in items:
+        try:
+            model = item.select_one('span.compatibility-list__item__head__name').text().strip()
+            year = item.select_one('div[data-head-title="Year"]').text().strip()
+            engine = item.select_one('div[data-head-title="Engine"]').text().strip()
+            power = item.select_one('div[data-head-title="Power (hp)"]').text().strip()
+            fuel = item.select_one('div[data-head-title="Fuel type"]').text().strip()
+            engine_type = item.select_one('div[data-head-title="Engine type"]').text().strip()
+
+            part_details.append({
+                'Part Number': part_number,
+                'Product Name': product_name,
+                'Brand Name': brand_name,
+                'Pincode': pin,
+                'Price': price,
+                'Model': model,
+                'Year': year,
+                'Engine': engine,
+                'Power (hp)': power,
+                'Fuel Type': fuel,
+                'Engine Type': engine_type
+            })
+        except Exception as e:
+            print(f"Error parsing compatibility item for {part_number}: {e}")
+            continue
+
+    return part_details
+
+def extract_part_details_direct(driver, part_number, search_url=SEARCH_URL):
+    """Open the search results URL for part_number; None if it doesn't land on a part page"""
+    try:
+        if RESULTS_READY.load(driver, search_url.format(query=quote(part_number, safe=""))) != "selector":
+            return None
+    except TimeoutException:
+        return None
+    return parse_part_details(driver.page_source, part_number)
+
+def extract_part_details(driver, part_number):
+    """Search part_number through the home page search form.
+
+    [] if no compatibility list showed up within RESULTS_READY's full
+    timeout, None if the search itself failed.
+    """
+    part_details = None
     try:
-        driver.get("https://boodmo.com")
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "form.search-form")))
+        if HOME_READY.load(driver, "https://boodmo.com") != "selector":
+            raise TimeoutException("search form did not appear")
 
         search_input = driver.find_element(By.CSS_SELECTOR, "input.form-control.search-form__filed__control")
         search_input.clear()
         search_input.send_keys(part_number)
 
         submit_button = driver.find_element(By.CSS_SELECTOR, "button.search-form__button__search")
+        started = time.monotonic()
         submit_button.click()
 
-        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CLASS_NAME, "compatibility-list__item")))
-        time.sleep(2)
-
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        items = soup.find_all('div', class_='compatibility-list__item')
-
-        product_name_tag = soup.find('h2', class_='part-info-heading')
-        product_name = product_name_tag.text.strip() if product_name_tag else 'N/A'
-
-        brand_anchor = soup.find('a', class_='part-info-top__brand')
-        brand_img = brand_anchor.find('img', class_='lazy-load-images__image') if brand_anchor else None
-        brand_name = brand_img['alt'].strip() if brand_img and 'alt' in brand_img.attrs else 'N/A'
-
-        price_tag = soup.find('span', class_='part-info-price__mrp')
-        price = price_tag.text.strip() if price_tag else 'N/A'
-
-        pin = '122003'  # Default pincode
-
-        for item in items:
-            try:
-                model = item.find('span', class_='compatibility-list__item__head__name').text.strip()
-                year = item.find('div', {'data-head-title': 'Year'}).text.strip()
-                engine = item.find('div', {'data-head-title': 'Engine'}).text.strip()
-                power = item.find('div', {'data-head-title': 'Power (hp)'}).text.strip()
-                fuel = item.find('div', {'data-head-title': 'Fuel type'}).text.strip()
-                engine_type = item.find('div', {'data-head-title': 'Engine type'}).text.strip()
-
-                part_details.append({
-                    'Part Number': part_number,
-                    'Product Name': product_name,
-                    'Brand Name': brand_name,
-                    'Pincode': pin,
-                    'Price': price,
-                    'Model': model,
-                    'Year': year,
-                    'Engine': engine,
-                    'Power (hp)': power,
-                    'Fuel Type': fuel,
-                    'Engine Type': engine_type
-                })
-            except Exception as e:
-                print(f"Error parsing compatibility item for {part_number}: {e}")
-                continue
+        if RESULTS_READY.wait(driver, driver.current_url, started) != "selector":
+            print(f"No compatibility list for {part_number}")
+            return []
+        part_details = parse_part_details(driver.page_source, part_number)
 
     except Exception as e:
         print(f"Search interaction failed for {part_number}: {e}")
 
     return part_details
 
-def read_part_numbers_from_excel(file_path):
-    try:
-        df_excel = pd.read_excel(file_path)
-        print("Column Names in Excel Sheet:", df_excel.columns.tolist())
+def lookup_part(driver, part_number, search_url=SEARCH_URL):
+    """Try the direct search URL first and fall back to the search form.
 
-        if "Part Number" in df_excel.columns:
-            return df_excel["Part Number"].astype(str).tolist()
-        else:
-            print("Error: 'Part Number' column not found.")
-            return []
+    A worker whose direct lookups keep missing while the form finds the
+    part stops trying them, so a changed URL scheme costs a few extra page
+    loads rather than doubling every lookup.
+    """
+    global _direct_misses
+    if search_url and _direct_misses < DIRECT_MISSES:
+        try:
+            part_details = extract_part_details_direct(driver, part_number, search_url)
+        except WebDriverException:
+            raise
+        except Exception as e:
+            print(f"Direct lookup failed for {part_number}: {e}")
+            part_details = None
+        if part_details:
+            _direct_misses = 0
+            return part_details
+
+        part_details = extract_part_details(driver, part_number)
+        if part_details:
+            _direct_misses += 1
+        return part_details
+
+    return extract_part_details(driver, part_number)
+
+def _cell_text(value):
+    # same strings pd.read_excel(...).astype(str) gave for whole numbers
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
 
+def iter_part_numbers(file_path, chunk_size=1000):
+    """Part numbers of the 'Part Number' column in chunks of chunk_size, read row by row.
+
+    The workbook is opened read-only, so only the rows of the current chunk
+    are in memory however long the sheet is. Empty cells are skipped.
+    """
+    try:
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
     except FileNotFoundError:
         print(f"Error: Excel file not found at {file_path}")
+        return
     except Exception as e:
         print(f"An error occurred while reading the Excel file: {e}")
-    return []
+        return
 
-def main():
-    excel_file = r"C:\Users\DIPIN KARUNAKARAN\Downloads\Sample_Larsen (4).xlsx"
-    part_numbers = read_part_numbers_from_excel(excel_file)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(value) if value is not None else "" for value in next(rows, ())]
+        print("Column Names in Excel Sheet:", header)
+        if "Part Number" not in header:
+            print("Error: 'Part Number' column not found.")
+            return
+        column = header.index("Part Number")
+
+        chunk = []
+        for row in rows:
+            value = row[column] if column < len(row) else None
+            if value is None or value == "":
+                continue
+            chunk.append(_cell_text(value))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+class RowSink:
+    """Streams compatibility rows to a CSV sidecar, flushed to disk every flush_every parts.
+
+    Everything written survives a crash mid-sheet; finish() then turns the
+    CSV into the .xlsx through a write-only workbook, one row at a time.
+    """
+
+    def __init__(self, csv_path, flush_every=50):
+        self.csv_path = csv_path
+        self.flush_every = flush_every
+        self.file = open(csv_path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=COLUMNS)
+        self.writer.writeheader()
+        self.rows = 0
+        self.parts = 0
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.rows += len(rows)
+        self.parts += 1
+        if self.parts % self.flush_every == 0:
+            self.flush()
 
-    all_results = []
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
 
-    if part_numbers:
-        driver = initialize_browser()
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
 
+    def finish(self, xlsx_path):
+        self.close()
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        with open(self.csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                sheet.append(row)
+        tmp = xlsx_path + ".tmp"
+        workbook.save(tmp)
+        os.replace(tmp, xlsx_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up Boodmo vehicle compatibility for a sheet of part numbers")
+    parser.add_argument("--input", default=r"C:\Users\DIPIN KARUNAKARAN\Downloads\Sample_Larsen (4).xlsx",
+                        help="workbook with a 'Part Number' column")
+    parser.add_argument("--output", default="boodmo_compatibility_data.xlsx",
+                        help="output workbook; rows are streamed to the .csv next to it first (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="part numbers read and searched per batch (default: %(default)s)")
+    parser.add_argument("--flush-every", type=int, default=50, metavar="N",
+                        help="flush the CSV to disk every N parts (default: %(default)s)")
+    parser.add_argument("--search-url", default=SEARCH_URL,
+                        help="search results URL template, {query} is the part number (default: %(default)s)")
+    parser.add_argument("--form-only", action="store_true",
+                        help="always search through the home page form instead of the search URL")
+    parser.add_argument("--cache", default="boodmo_part_cache.sqlite", metavar="PATH",
+                        help="SQLite cache of looked-up parts, shared across sheets and runs (default: %(default)s)")
+    parser.add_argument("--ttl-days", type=float, default=30,
+                        help="look parts up again once their cached rows are this old (default: %(default)s)")
+    parser.add_argument("--empty-ttl-days", type=float, default=1,
+                        help="same for parts that returned no rows (default: %(default)s)")
+    parser.add_argument("--refresh", action="store_true", help="look every part up again, updating the cache")
+    readiness_args(parser)
+    args = parser.parse_args()
+    task = partial(lookup_part, search_url=None if args.form_only else args.search_url)
+
+    output_file = args.output
+    # Check if the file is open or locked
+    if os.path.exists(output_file):
         try:
-            for pn in part_numbers:
-                print(f"\nSearching for part: {pn}")
-                results = extract_part_details(driver, pn)
-
-                if results:
-                    print(f"Found {len(results)} compatibility records for {pn}")
-                    all_results.extend(results)
-                else:
-                    print(f"No compatibility data found for {pn}")
-
-                print("\n" + "=" * 80 + "\n")
-        finally:
-            driver.quit()
-
-        if all_results:
-            df_results = pd.DataFrame(all_results)
-            output_file = "boodmo_compatibility_data.xlsx"
-
-            # Check if the file is open or locked
-            if os.path.exists(output_file):
-                try:
-                    os.rename(output_file, output_file)
-                except OSError:
-                    print(f"Error: The file '{output_file}' is open or locked. Please close it and try again.")
-                    return
-
-            try:
-                df_results.to_excel(output_file, index=False)
-                print(f"\nData saved to {output_file}")
-            except PermissionError:
-                print(f"Error: Permission denied when trying to write to '{output_file}'. Please ensure the file is not open and you have write permissions.")
-        else:
-            print("\nNo data to save to Excel.")
-    else:
+            os.rename(output_file, output_file)
+        except OSError:
+            print(f"Error: The file '{output_file}' is open or locked. Please close it and try again.")
+            return
+
+    cache = PartCache(args.cache, ttl=args.ttl_days * 86400, empty_ttl=args.empty_ttl_days * 86400)
+    sink = RowSink(os.path.splitext(output_file)[0] + ".csv", flush_every=args.flush_every)
+    # parts searched during this run, so --refresh and failures don't repeat them
+    searched = set()
+    sheet_rows = 0
+
+    try:
+        for chunk in iter_part_numbers(args.input, args.chunk_size):
+            sheet_rows += len(chunk)
+            found, missing = cache.split(chunk, refresh=args.refresh, searched=searched)
+            print(f"\n{len(chunk)} rows, {len(found) + len(missing)} distinct parts, {len(found)} cached")
+
+            if missing:
+                print(f"Searching for {len(missing)} parts with {WORKERS} browsers")
+
+                # results come back in the same order as missing
+                for pn, results in zip(missing, run_with_drivers(missing, task, initialize_browser, processes=WORKERS)):
+                    if results:
+                        print(f"Found {len(results)} compatibility records for {pn}")
+                    else:
+                        print(f"No compatibility data found for {pn}")
+                    # None means the lookup failed (or the browser died), so leave it for the next run
+                    if results is not None:
+                        cache.put(pn, results)
+                    searched.add(pn)
+                    found[pn] = results or []
+
+                    print("\n" + "=" * 80 + "\n")
+
+            # one block of rows per sheet row, as before, duplicates included
+            for pn in chunk:
+                sink.write(found.get(pn, []))
+    finally:
+        sink.close()
+        cache.close()
+
+    if not sheet_rows:
         print("\nNo part numbers to search.")
+    elif not sink.rows:
+        print("\nNo data to save to Excel.")
+    else:
+        try:
+            sink.finish(output_file)
+            print(f"\nData saved to {output_file} ({sink.rows} rows, also in {sink.csv_path})")
+        except PermissionError:
+            print(f"Error: Permission denied when trying to write to '{output_file}'. Please ensure the file is not open and you have write permissions.")
 
 if __name__ == "__main__":
     main()
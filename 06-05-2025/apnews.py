@@ -1,35 +1,44 @@
-import requests
-from bs4 import BeautifulSoup
-import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.checkpoint import open_checkpoint
+from common.cli import open_http_cache, scraper_args
+from common.output import open_output
+from common.parsers import parse_html
+from common.sessions import get_session
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0"
+}
 
 def extract_article_data(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
+    response = get_session("apnews", headers=HEADERS).get(url)
+    return parse_article_data(response.content, url)
 
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.content, "html.parser")
+def parse_article_data(html, url):
+    doc = parse_html(html)
 
     # Headline
-    headline = soup.find("h1", class_="Page-headline")
-    headline_text = headline.get_text(strip=True) if headline else "N/A"
+    headline = doc.select_one("h1.Page-headline")
+    headline_text = headline.text(strip=True) if headline else "N/A"
 
     # Date
-    date_span = soup.select_one(".Page-dateModified [data-date]")
-    date_text = date_span.get_text(strip=True) if date_span else "N/A"
+    date_span = doc.select_one(".Page-dateModified [data-date]")
+    date_text = date_span.text(strip=True) if date_span else "N/A"
 
     # Article body
-    article_div = soup.find("div", class_="RichTextStoryBody")
-    article_paragraphs = article_div.find_all("p") if article_div else []
-    article_text = "\n".join(p.get_text(strip=True) for p in article_paragraphs)
+    article_div = doc.select_one("div.RichTextStoryBody")
+    article_paragraphs = article_div.select("p") if article_div else []
+    article_text = "\n".join(p.text(strip=True) for p in article_paragraphs)
 
     # One image per figure
     image_urls = []
-    figures = soup.find_all("figure", class_="Figure")
+    figures = doc.select("figure.Figure")
     for figure in figures:
-        first_source = figure.find("source", srcset=True)
+        first_source = figure.select_one("source[srcset]")
         if first_source:
-            srcset = first_source["srcset"]
+            srcset = first_source.get("srcset")
             image_url = srcset.split(",")[0].split()[0]
             image_urls.append(image_url)
 
@@ -41,21 +50,30 @@ def extract_article_data(url):
         "images": image_urls
     }
 
-# Read URLs from file
-with open("article_links.txt", "r", encoding="utf-8") as file:
-    urls = [line.strip() for line in file if line.strip()]
+def main():
+    args = scraper_args("Scrape AP News articles listed in article_links.txt").parse_args()
+
+    # set up the shared session first so --http-cache applies to every fetch
+    get_session("apnews", headers=HEADERS, cache=open_http_cache(args))
+
+    # Read URLs from file
+    with open("article_links.txt", "r", encoding="utf-8") as file:
+        urls = [line.strip() for line in file if line.strip()]
+
+    checkpoint = open_checkpoint("all_articles_output.json", jsonl=args.jsonl, resume=args.resume)
+    todo = checkpoint.pending(urls)
 
-# Extract data for each article
-all_articles = []
-for url in urls:
-    try:
-        article_data = extract_article_data(url)
-        all_articles.append(article_data)
-    except Exception as e:
-        print(f"Failed to process {url}: {e}")
+    # Extract data for each article, saving as we go with --jsonl
+    with checkpoint, open_output("all_articles_output.json", jsonl=args.jsonl,
+                                 fsync_every=args.fsync_every, resume=args.resume) as output:
+        for url in todo:
+            try:
+                checkpoint.mark_done(url, output.write(extract_article_data(url)))
+            except Exception as e:
+                print(f"Failed to process {url}: {e}")
+                checkpoint.mark_failed(url, e)
 
-# Save all data to JSON
-with open("all_articles_output.json", "w", encoding="utf-8") as f:
-    json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    print(f"Saved all articles to {output.path}")
 
-print("Saved all articles to all_articles_output.json")
+if __name__ == "__main__":
+    main()
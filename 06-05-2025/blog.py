@@ -1,45 +1,40 @@
+import argparse
 import json
+import os
+import sys
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.blocking import BlockPolicy, cdp_page_report, enable_performance_log, install_cdp_blocking
+from common.cli import follow_args
+from common.liveblog import LiveblogParser, blog_record, follow, state_path, text
 
 url = "https://www.timesofisrael.com/liveblog-april-28-2025/"
 
+# only the DOM is read, so skip images, fonts, video and ad/analytics hosts
+BLOCK_POLICY = BlockPolicy()
+
+args = follow_args(argparse.ArgumentParser(description=f"Save the liveblog at {url}")).parse_args()
+if args.follow:
+    # no browser: poll over HTTP and append only entries added or edited since the last poll
+    follow([url], "liveblog_updates.jsonl", state_path("liveblog_updates.jsonl"), record=blog_record,
+           interval=args.interval, known_run=args.known_run, max_polls=args.max_polls)
+    sys.exit()
 
 options = Options()
 options.headless = True
+enable_performance_log(options)
 driver = webdriver.Chrome(options=options)
+install_cdp_blocking(driver, BLOCK_POLICY)
 driver.get(url)
+print(cdp_page_report(driver).summary(url))
 
 
-soup = BeautifulSoup(driver.page_source, "html.parser")
-
-
-title = soup.find("h1", class_="headline").get_text(
-    strip=True) if soup.find("h1", class_="headline") else "No title found"
-
-entries = []
-liveblog_divs = soup.find_all("div", class_="liveblog-paragraph")
-
-for div in liveblog_divs:
-    entry = {}
-
-    time_tag = div.find_previous_sibling("div", class_="liveblog-date")
-    entry["time"] = time_tag.get_text(strip=True) if time_tag else "No time"
-
-    headline_tag = div.find("h4")
-    entry["headline"] = headline_tag.get_text(
-        strip=True) if headline_tag else "No headline"
-
-    paragraphs = div.find_all("p")
-    content = " ".join(p.get_text(strip=True) for p in paragraphs)
-    entry["content"] = content if content else "No content"
-
-    byline = div.find("div", class_="byline")
-    entry["author"] = byline.get_text(strip=True).replace(
-        "By", "") if byline else "Unknown"
-
-    entries.append(entry)
+# one forward pass over the page, each entry paired with the date before it
+parser = LiveblogParser(unit="paragraph")
+entries = [blog_record(entry) for entry in parser.entries(driver.page_source)]
+title = text(parser.title, strip=True) if parser.title is not None else "No title found"
 
 
 data = {
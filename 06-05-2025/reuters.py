@@ -1,79 +1,142 @@
-import requests
-from bs4 import BeautifulSoup
-import json
+import os
+import sys
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.checkpoint import open_checkpoint
+from common.cli import embedded_args, open_http_cache, scraper_args
+from common.embedded import assigned_json, dig, element_texts, with_fallback
+from common.headmeta import scan_head
+from common.output import open_output
+from common.parsers import Targets, parse_html
+from common.sessions import get_session
+
 # Read news article links from text file
 def read_urls_from_file(file_path):
     with open(file_path, 'r') as file:
         urls = file.readlines()
     return [url.strip() for url in urls]
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# the summary bullets are the one field the embedded JSON doesn't carry
+SUMMARY_TARGETS = Targets('ul[data-testid="Summary"]')
+
+# what parse_article_data reads from the body; the <h1> only when <head> has no headline
+BODY_TARGETS = Targets('ul[data-testid="Summary"]', 'div[data-testid^="paragraph-"]')
+TITLE_BODY_TARGETS = Targets("h1", 'ul[data-testid="Summary"]', 'div[data-testid^="paragraph-"]')
+
 # Extract article details from a Reuters URL
-def extract_article_data(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
+def extract_article_data(url, embedded=False):
     try:
-        response = requests.get(url, headers=headers)
+        response = get_session("reuters", headers=HEADERS).get(url)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Title
-        title_tag = soup.find("h1")
-        title = title_tag.get_text(strip=True) if title_tag else "No title found"
-
-        # Publication datetime
-        pub_time_meta = soup.find("meta", attrs={"property": "og:article:published_time"})
-        pub_datetime = pub_time_meta["content"] if pub_time_meta else None
-        pub_display = None
-        if pub_datetime:
-            dt_obj = datetime.fromisoformat(pub_datetime.replace("Z", "+00:00"))
-            pub_display = dt_obj.strftime("%B %d, %Y | %I:%M %p UTC")
-
-        # Image
-        image_meta = soup.find("meta", attrs={"property": "og:image"})
-        image_url = image_meta["content"] if image_meta else None
-
-        # Summary bullets
-   # Fix summary selector
-        summary_section = soup.find("ul", attrs={"data-testid": "Summary"})
-        summary = [li.get_text(strip=True) for li in summary_section.find_all("li")] if summary_section else []
-
-
-        # Article content
-        paragraphs = soup.find_all("div", attrs={"data-testid": lambda x: x and x.startswith("paragraph-")})
-        content = "\n".join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
-
-        return {
-            "title": title,
-            "url": url,
-            "publication_datetime": pub_datetime,
-            "publication_display": pub_display,
-            "image_url": image_url,
-            "summary": summary,
-            "content": content
-        }
+        if embedded:
+            article_data = parse_article_json(response.text, url)
+            if article_data:
+                return with_fallback(article_data, lambda: parse_article_data(response.text, url))
+        return parse_article_data(response.text, url)
 
     except Exception as e:
         print(f"❌ Error extracting data from {url}: {e}")
         return None
 
+# Pull the article fields out of a Reuters page
+def parse_article_data(html, url):
+    # headline, date and image come from a scan of <head>; the DOM only
+    # holds the summary, the paragraphs and, if the head had no headline, the <h1>
+    head = scan_head(html)
+    headline = head.ld_value("headline")
+    headline = headline.strip() if isinstance(headline, str) and headline.strip() else None
+    doc = parse_html(html, only=BODY_TARGETS if headline is not None else TITLE_BODY_TARGETS)
+
+    # Title
+    if headline is not None:
+        title = headline
+    else:
+        title_tag = doc.select_one("h1")
+        title = title_tag.text(strip=True) if title_tag else "No title found"
+
+    # Publication datetime
+    pub_datetime = head.get("og:article:published_time")
+    pub_display = format_publication_time(pub_datetime)
+
+    # Image
+    image_url = head.get("og:image")
+
+    # Summary bullets
+    # Fix summary selector
+    summary_section = doc.select_one('ul[data-testid="Summary"]')
+    summary = [li.text(strip=True) for li in summary_section.select("li")] if summary_section else []
+
+
+    # Article content
+    paragraphs = doc.select('div[data-testid^="paragraph-"]')
+    content = "\n".join([p.text(strip=True) for p in paragraphs if p.text(strip=True)])
+
+    return {
+        "title": title,
+        "url": url,
+        "publication_datetime": pub_datetime,
+        "publication_display": pub_display,
+        "image_url": image_url,
+        "summary": summary,
+        "content": content
+    }
+
+def format_publication_time(pub_datetime):
+    if not pub_datetime:
+        return None
+    dt_obj = datetime.fromisoformat(pub_datetime.replace("Z", "+00:00"))
+    return dt_obj.strftime("%B %d, %Y | %I:%M %p UTC")
+
+# Same fields from the article JSON the page assigns to Fusion.globalContent,
+# or None when the page doesn't carry it
+def parse_article_json(html, url):
+    article = dig(assigned_json(html, "Fusion.globalContent"), "result")
+    if not isinstance(article, dict):
+        return None
+
+    head = scan_head(html)
+    pub_datetime = article.get("published_time") or head.properties.get("og:article:published_time")
+
+    summary_section = parse_html(html, only=SUMMARY_TARGETS).select_one('ul[data-testid="Summary"]')
+    summary = [li.text(strip=True) for li in summary_section.select("li")] if summary_section else []
+
+    return {
+        "title": article.get("title"),
+        "url": url,
+        "publication_datetime": pub_datetime,
+        "publication_display": format_publication_time(pub_datetime),
+        "image_url": head.properties.get("og:image"),
+        "summary": summary,
+        "content": "\n".join(element_texts(article.get("content_elements"), types=("paragraph",)))
+    }
+
 # Main function
 def main():
+    args = embedded_args(scraper_args("Scrape Reuters articles listed in news_links.txt")).parse_args()
     urls = read_urls_from_file("news_links.txt")
-    all_articles = []
 
-    for url in urls:
-        article_data = extract_article_data(url)
-        if article_data:
-            all_articles.append(article_data)
+    # set up the shared session first so --http-cache applies to every fetch
+    get_session("reuters", headers=HEADERS, cache=open_http_cache(args))
+
+    checkpoint = open_checkpoint("articles_data.json", jsonl=args.jsonl, resume=args.resume)
+    todo = checkpoint.pending(urls)
 
-    with open("articles_data.json", "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    with checkpoint, open_output("articles_data.json", jsonl=args.jsonl,
+                                 fsync_every=args.fsync_every, resume=args.resume) as output:
+        for url in todo:
+            article_data = extract_article_data(url, embedded=args.embedded_json)
+            if article_data:
+                checkpoint.mark_done(url, output.write(article_data))
+            else:
+                checkpoint.mark_failed(url)
 
-    print("✅ Articles saved to articles_data.json")
+    print(f"✅ Articles saved to {output.path}")
 
 if __name__ == "__main__":
     main()
@@ -1,43 +1,62 @@
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
 import json
-import time
-import random
 import re
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.checkpoint import open_checkpoint
+from common.cli import open_http_cache, scraper_args
+from common.fetch import fetch_all
+from common.output import open_output
+from common.parsers import Targets, parse_html
+from common.ratelimit import DomainRateLimiter
+from common.sessions import get_session
+
+# outermost elements parse_thehill_article reads; the rest of the page is never built
+PARSE_TARGETS = Targets(
+    "h1.page-title",
+    "section.submitted-by",
+    "div.article__text",
+    "img",
+    "div.caption",
+)
+
 def load_browser_cookies(filepath):
     with open(filepath, "r") as f:
         raw_cookies = json.load(f)
     return {cookie["name"]: cookie["value"] for cookie in raw_cookies}
 
 def scrape_thehill_article(url, cookies, headers):
-    response = requests.get(url, headers=headers, cookies=cookies)
+    response = get_session("thehill", headers=headers, cookies=cookies).get(url)
     if response.status_code != 200:
         print(f"❌ Failed to fetch {url}. Status code: {response.status_code}")
         return None
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    return parse_thehill_article(url, response.text)
+
+def parse_thehill_article(url, html):
+    doc = parse_html(html, only=PARSE_TARGETS)
 
     # Title
-    title_tag = soup.find("h1", class_="page-title")
-    title = title_tag.get_text(strip=True) if title_tag else "No title found"
+    title_tag = doc.select_one("h1.page-title")
+    title = title_tag.text(strip=True) if title_tag else "No title found"
 
     # Date
-    date_section = soup.find("section", class_="submitted-by")
+    date_section = doc.select_one("section.submitted-by")
     if date_section:
-        match = re.search(r"\d{2}/\d{2}/\d{2} \d{1,2}:\d{2} [AP]M ET", date_section.get_text(strip=True))
+        match = re.search(r"\d{2}/\d{2}/\d{2} \d{1,2}:\d{2} [AP]M ET", date_section.text(strip=True))
         published_date = match.group(0) if match else "No date found"
     else:
         published_date = "No date found"
 
     # Article content
-    article_section = soup.find("div", class_="article__text")
+    article_section = doc.select_one("div.article__text")
     article_text = ""
     if article_section:
         paragraphs = [
-            p.get_text(strip=True)
-            for p in article_section.find_all("p")
-            if p.get_text(strip=True)
+            p.text(strip=True)
+            for p in article_section.select("p")
+            if p.text(strip=True)
         ]
         article_text = "\n".join(paragraphs)
     else:
@@ -46,22 +65,22 @@ def scrape_thehill_article(url, cookies, headers):
     # Image
     image_url = "No image found"
 
-    for img in soup.find_all("img"):
+    for img in doc.select("img"):
         src = img.get("src", "")
         if any(part in src for part in ["/assets/", "/themes/", "logo", "icon", "sprite", "google-news"]):
             continue
 
         if "wp-content/uploads" in src:
             if img.has_attr("srcset"):
-                srcset_urls = [entry.split()[0] for entry in img["srcset"].split(",")]
+                srcset_urls = [entry.split()[0] for entry in img.get("srcset").split(",")]
                 image_url = srcset_urls[-1] if srcset_urls else src
             else:
                 image_url = src
             break
 
 
-    caption_div = soup.find("div", class_="caption")
-    subheadline = caption_div.get_text(strip=True) if caption_div else "No subheadline found"
+    caption_div = doc.select_one("div.caption")
+    subheadline = caption_div.text(strip=True) if caption_div else "No subheadline found"
 
 
     return {
@@ -74,6 +93,7 @@ def scrape_thehill_article(url, cookies, headers):
     }
 
 def main():
+    args = scraper_args("Scrape The Hill articles listed in thehill_urls.txt").parse_args()
     cookies = load_browser_cookies("cookie.json")
 
     headers = {
@@ -84,21 +104,29 @@ def main():
     with open("thehill_urls.txt", "r") as f:
         urls = [line.strip() for line in f if line.strip()]
 
-    all_articles = []
-    for url in urls:
-        print(f"🔍 Scraping {url} ...")
-        article_data = scrape_thehill_article(url, cookies, headers)
-        if article_data:
-            all_articles.append(article_data)
-
-        delay = random.uniform(1, 3)
-        print(f"Sleeping for {delay:.2f} seconds...")
-        time.sleep(delay)
-
-    with open("thehill_articles.json", "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=4)
-
-    print(f" Done. Scraped {len(all_articles)} articles saved to thehill_articles.json")
+    # requests run concurrently, each host stays at about one request every 2-3s
+    limiter = DomainRateLimiter(rate=0.5, jitter=1.0)
+
+    checkpoint = open_checkpoint("thehill_articles.json", jsonl=args.jsonl, resume=args.resume)
+    todo = checkpoint.pending(urls)
+    if args.resume:
+        print(f"Resuming: {len(urls) - len(todo)} URLs already done")
+
+    with checkpoint, open_output("thehill_articles.json", jsonl=args.jsonl, indent=4,
+                                 fsync_every=args.fsync_every, order=urls, resume=args.resume) as output:
+        def handle_response(url, status, html):
+            if status != 200:
+                print(f"❌ Failed to fetch {url}. Status code: {status}")
+                checkpoint.mark_failed(url, f"HTTP {status}")
+                return
+            print(f"🔍 Scraped {url}")
+            checkpoint.mark_done(url, output.write(parse_thehill_article(url, html)))
+
+        print(f"🔍 Scraping {len(todo)} URLs ...")
+        fetch_all(todo, handle_response, cookies=cookies, headers=headers, limiter=limiter,
+                  cache=open_http_cache(args))
+
+    print(f" Done. Scraped {output.count} articles saved to {output.path}")
 
 if __name__ == "__main__":
     main()
@@ -1,127 +1,204 @@
 from datetime import datetime
-import json
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-
-def extract_politico_article(page, url):
-    try:
-        page.goto(url, timeout=90000, wait_until="domcontentloaded")
-
-        html_content = page.content()
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        with open("politico_body.html", "w", encoding="utf-8") as f:
-            f.write(soup.prettify())
-
-        # HEADLINE
-        headline = soup.select_one("h1.headline, h1.article__headline, h1")
-        headline_text = headline.get_text(strip=True) if headline else "N/A"
-
-        # SUBHEADING
-        subheading = soup.select_one("p.dek, div.dek, div.summary, h2")
-        subheading_text = subheading.get_text(strip=True) if subheading else "N/A"
-
-        # DATE
-        time_tag = soup.select_one("time[datetime], p.story-meta__timestamp time")
-        timestamp_text = time_tag.get("datetime") if time_tag else None
-
-        if not timestamp_text:
-            date_tag = soup.select_one("span.date-time__date")
-            time_tag = soup.select_one("span.date-time__time")
-
-            date_part = date_tag.get_text(strip=True) if date_tag else ""
-            time_part = time_tag.get_text(strip=True) if time_tag else ""
-
-            if date_part or time_part:
-                timestamp_text = f"{date_part} {time_part}".strip()
-            else:
-                timestamp_text = "N/A"
-
-        # Format final readable date
-        if timestamp_text != "N/A":
-            try:
-                timestamp_dt = datetime.strptime(timestamp_text, "%Y-%m-%d %H:%M:%S")
-                date_text = timestamp_dt.strftime("%B %d, %Y – %I:%M %p EDT")
-            except ValueError:
-                date_text = timestamp_text
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.archive import HtmlArchive
+from common.blocking import BlockPolicy, install_route_blocking_async
+from common.checkpoint import open_checkpoint
+from common.cli import archive_args, fetch_args, open_archive, open_http_cache, readiness_args, scraper_args
+from common.hybrid import http_first
+from common.output import open_output
+from common.parsers import parse_html
+from common.playwright_pool import run_with_pages
+from common.ratelimit import DomainRateLimiter
+from common.readiness import Readiness
+
+# number of pages open at once, and how many articles each serves before it is recycled
+POOL_SIZE = 6
+PAGE_MAX_USES = 10
+
+# only the DOM is read, so skip images, fonts, video and ad/analytics hosts
+BLOCK_POLICY = BlockPolicy()
+
+READY = Readiness(["div.story-text", "div.article__content", "article[data-story-id]"], timeout=90)
+
+def empty_article(url):
+    return {
+        "url": url,
+        "headline": "N/A",
+        "subheading": "N/A",
+        "date": "N/A",
+        "article": "N/A",
+        "image": None
+    }
+
+async def extract_politico_article_async(page, url, archive=None):
+    # errors propagate so the pool replaces the page they happened on
+    await READY.goto_async(page, url)
+    html_content = await page.content()
+    if archive:
+        archive.put(url, html_content)
+    return parse_politico_html(html_content, url)
+
+def parse_politico_html(html, url):
+    doc = parse_html(html)
+
+    # HEADLINE
+    headline = doc.select_one("h1.headline, h1.article__headline, h1")
+    headline_text = headline.text(strip=True) if headline else "N/A"
+
+    # SUBHEADING
+    subheading = doc.select_one("p.dek, div.dek, div.summary, h2")
+    subheading_text = subheading.text(strip=True) if subheading else "N/A"
+
+    # DATE
+    time_tag = doc.select_one("time[datetime], p.story-meta__timestamp time")
+    timestamp_text = time_tag.get("datetime") if time_tag else None
+
+    if not timestamp_text:
+        date_tag = doc.select_one("span.date-time__date")
+        time_tag = doc.select_one("span.date-time__time")
+
+        date_part = date_tag.text(strip=True) if date_tag else ""
+        time_part = time_tag.text(strip=True) if time_tag else ""
+
+        if date_part or time_part:
+            timestamp_text = f"{date_part} {time_part}".strip()
         else:
-            date_text = "N/A"
-
-        # ARTICLE BODY
-        article_texts = []
-
-        for selector in [
-            "div.story-text",
-            "div.article__content",
-            "main article",
-            "article[data-story-id]",
-            "section.article-content"
-        ]:
-            article_sections = soup.select(selector)
-            for section in article_sections:
-                paragraphs = section.select("p")
-                text = "\n".join(
-                    [p.get_text(separator=" ", strip=True) for p in paragraphs if p.get_text(strip=True)]
-                )
-                if text:
-                    article_texts.append(text)
-
-        article_text = "\n\n".join(article_texts) if article_texts else "N/A"
-
-        # IMAGE
-        image_tag = soup.select_one("figure img, img.article__image")
-        image = image_tag.get("src") if image_tag and image_tag.get("src") else None
-
-        if not image:
-            og_image = soup.find("meta", property="og:image")
-            image = og_image.get("content") if og_image else None
-
-        return {
-            "url": url,
-            "headline": headline_text,
-            "subheading": subheading_text,
-            "date": date_text,
-            "article": article_text,
-            "image": image
-        }
-
-    except Exception as e:
-        print(f"Failed to process {url}: {e}")
-        return {
-            "url": url,
-            "headline": "N/A",
-            "subheading": "N/A",
-            "date": "N/A",
-            "article": "N/A",
-            "image": None
-        }
+            timestamp_text = "N/A"
+
+    # Format final readable date
+    if timestamp_text != "N/A":
+        try:
+            timestamp_dt = datetime.strptime(timestamp_text, "%Y-%m-%d %H:%M:%S")
+            date_text = timestamp_dt.strftime("%B %d, %Y – %I:%M %p EDT")
+        except ValueError:
+            date_text = timestamp_text
+    else:
+        date_text = "N/A"
+
+    # ARTICLE BODY
+    article_texts = []
+
+    for selector in [
+        "div.story-text",
+        "div.article__content",
+        "main article",
+        "article[data-story-id]",
+        "section.article-content"
+    ]:
+        article_sections = doc.select(selector)
+        for section in article_sections:
+            paragraphs = section.select("p")
+            text = "\n".join(
+                [p.text(separator=" ", strip=True) for p in paragraphs if p.text(strip=True)]
+            )
+            if text:
+                article_texts.append(text)
+
+    article_text = "\n\n".join(article_texts) if article_texts else "N/A"
+
+    # IMAGE
+    image_tag = doc.select_one("figure img, img.article__image")
+    image = image_tag.get("src") if image_tag and image_tag.get("src") else None
+
+    if not image:
+        og_image = doc.select_one('meta[property="og:image"]')
+        image = og_image.get("content") if og_image else None
+
+    return {
+        "url": url,
+        "headline": headline_text,
+        "subheading": subheading_text,
+        "date": date_text,
+        "article": article_text,
+        "image": image
+    }
 
 # ---------- Main Runner ---------- #
 def main():
+    args = fetch_args(readiness_args(archive_args(scraper_args(
+        "Scrape POLITICO articles listed in POLITICO/politico.txt")))).parse_args()
     start_time = datetime.now()
     print("Started at:", start_time.strftime("%Y-%m-%d %I:%M:%S %p"))
 
     with open("POLITICO/politico.txt", "r", encoding="utf-8") as file:
         urls = [line.strip() for line in file if line.strip()]
 
-    all_articles = []
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-
-        for url in urls:
+    block_stats = {}
+
+    async def prepare_page(page):
+        block_stats[page] = await install_route_blocking_async(page, BLOCK_POLICY)
+
+    checkpoint = open_checkpoint("politico_articles_output_v1.json", jsonl=args.jsonl, resume=args.resume)
+    todo = checkpoint.pending(urls)
+    if args.resume:
+        print(f"Resuming: {len(urls) - len(todo)} URLs already done")
+
+    if args.replay:
+        # no browser: re-extract from the archived pages of these URLs
+        with checkpoint, open_output("politico_articles_output_v1.json", jsonl=args.jsonl,
+                                     fsync_every=args.fsync_every, order=urls, resume=args.resume) as output:
+            for url, html_content in HtmlArchive(args.replay).iter_latest(set(todo)):
+                checkpoint.mark_done(url, output.write(parse_politico_html(html_content, url)))
+        print(f"Replayed {output.count} articles from {args.replay}")
+        return
+
+    archive = open_archive(args)
+
+    with checkpoint, open_output("politico_articles_output_v1.json", jsonl=args.jsonl,
+                                 fsync_every=args.fsync_every, order=urls, resume=args.resume) as output:
+        def save_http(url, html_content):
+            article_data = parse_politico_html(html_content, url)
+            # a page without a headline gets another chance in the browser
+            if article_data["headline"] == "N/A" and args.fetch == "hybrid":
+                return False
+            if archive:
+                archive.put(url, html_content)
+            offset = output.write(article_data)
+            if article_data["headline"] == "N/A":
+                checkpoint.mark_failed(url, "no headline")
+            else:
+                checkpoint.mark_done(url, offset)
+
+        todo = http_first(todo, READY.selectors, save_http, mode=args.fetch,
+                          limiter=DomainRateLimiter(rate=1, jitter=0.5), cache=open_http_cache(args))
+        if args.fetch == "http":
+            for url in todo:
+                output.write(empty_article(url))
+                checkpoint.mark_failed(url, "fetch failed")
+            todo = []
+        elif todo:
+            print(f"{len(todo)} URLs need the browser")
+
+        async def scrape(page, url):
+            stats = block_stats[page]
+            stats.reset()
             try:
-                page = browser.new_page()
-                article_data = extract_politico_article(page, url)
-                all_articles.append(article_data)
-                page.close()
+                article_data = await extract_politico_article_async(page, url, archive)
             except Exception as e:
-                print(f"Error loading {url}: {e}")
+                output.write(empty_article(url))
+                checkpoint.mark_failed(url, e)
+                raise
+            finally:
+                print(stats.summary(url))
+            offset = output.write(article_data)
+            if article_data["headline"] == "N/A":
+                checkpoint.mark_failed(url, "no headline")
+            else:
+                checkpoint.mark_done(url, offset)
 
-        browser.close()
+        if todo:
+            asyncio.run(run_with_pages(
+                todo, scrape,
+                size=POOL_SIZE, max_uses=PAGE_MAX_USES, headless=False,
+                on_new_page=prepare_page, on_page_closed=lambda page: block_stats.pop(page, None)
+            ))
 
-    with open("politico_articles_output_v1.json", "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    if archive:
+        archive.close()
 
     end_time = datetime.now()
     print("Finished at:", end_time.strftime("%Y-%m-%d %I:%M:%S %p"))
@@ -1,7 +1,12 @@
+import os
+import sys
 import requests
 import csv
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.sessions import get_session
+
 # Define the URL for the scorecard API request
 url = "https://lmt.fn.sportradar.com/common/en/Etc:UTC/cricket/get_scorecard/60061743?T=exp=1747140257~acl=/*~data=eyJvIjoiaHR0cHM6Ly93aWRnZXRzLnNpci5zcG9ydHJhZGFyLmNvbSIsImEiOiJiZXRyYWRhciIsImFjdCI6Im9yaWdpbmNoZWNrIiwib3NyYyI6InhyZWYifQ~hmac=4aa2bba4c71792b09c28f158c58f6bc6f8734bf1834264cc69caa6ce83dea2d6"
 
@@ -17,18 +22,24 @@ headers = {
 
 def fetch_data(url):
     try:
-        response = requests.get(url, headers=headers)
+        response = get_session("sportradar", headers=headers).get(url)
         response.raise_for_status()  # Raises exception for 4XX/5XX errors
         return response.json()
     except requests.exceptions.RequestException as e:
         print(f"Request failed: {e}")
         return None
 
+def get_score(data):
+    """The score object of a get_scorecard response, or of a bare recorded score payload"""
+    if 'doc' not in data:
+        return data
+    return data.get('doc', [{}])[0].get('data', {}).get('score', {})
+
 def extract_match_info(data):
     """Extract basic match information"""
     try:
         doc = data.get('doc', [{}])[0]
-        score_data = doc.get('data', {}).get('score', {})
+        score_data = get_score(data)
         
         return {
             'match_id': doc.get('_id', 'N/A'),
@@ -49,14 +60,15 @@ def extract_match_info(data):
 def extract_batting_data(data):
     """Extract batting performance data"""
     try:
-        innings = data.get('doc', [{}])[0].get('data', {}).get('score', {}).get('innings', [])
+        innings = get_score(data).get('innings', [])
         batting_data = []
         
-        for inning in innings:
-            inning_num = inning.get('inningNumber', 'N/A')
-            batting = inning.get('batting', {})
+        for position, inning in enumerate(innings, 1):
+            inning_num = inning.get('inningNumber', position)
+            # recorded payloads list the players directly under 'batsmen'
+            batsmen = inning.get('batting', {}).get('batsman') or inning.get('batsmen', [])
             
-            for batsman in batting.get('batsman', []):
+            for batsman in batsmen:
                 batting_data.append({
                     'inning': inning_num,
                     'batsman': batsman.get('batsmanName', 'N/A'),
@@ -77,14 +89,14 @@ def extract_batting_data(data):
 def extract_bowling_data(data):
     """Extract bowling performance data"""
     try:
-        innings = data.get('doc', [{}])[0].get('data', {}).get('score', {}).get('innings', [])
+        innings = get_score(data).get('innings', [])
         bowling_data = []
         
-        for inning in innings:
-            inning_num = inning.get('inningNumber', 'N/A')
-            bowling = inning.get('bowling', {})
+        for position, inning in enumerate(innings, 1):
+            inning_num = inning.get('inningNumber', position)
+            bowlers = inning.get('bowling', {}).get('bowler') or inning.get('bowlers', [])
             
-            for bowler in bowling.get('bowler', []):
+            for bowler in bowlers:
                 bowling_data.append({
                     'inning': inning_num,
                     'bowler': bowler.get('bowlerName', 'N/A'),
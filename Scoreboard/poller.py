@@ -0,0 +1,322 @@
+"""Poll a live scorecard and write only the rows that changed.
+
+The previous scorecard is kept in memory. On every poll the match info,
+batting and bowling rows are diffed against it, and only new, changed or
+removed rows are appended to <prefix>_match.csv, <prefix>_batting.csv and
+<prefix>_bowling.csv, each with the poll time and the kind of change.
+
+While the match is live the scorecard is polled every --interval seconds.
+Once it is not (its status says so, or nothing changed for --idle-polls
+polls in a row) the interval doubles after every poll up to --max-interval,
+and drops back as soon as something changes again.
+
+To try it without a live match, serve recorded snapshots locally:
+
+    python replay_server.py live_scorecard.json --port 8765
+    python poller.py --url http://127.0.0.1:8765/ --interval 1
+
+--matches follows a whole day of fixtures from one process: every match in
+the file is polled concurrently over a single aiohttp connection pool, on
+its own schedule, into <prefix>_<match id>_*.csv.
+
+With --sqlite or --parquet every changed scorecard is also normalized into
+typed tables (see scorecard_store.py) for season-long queries.
+"""
+import argparse
+import asyncio
+import csv
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import aiohttp
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.ratelimit import DomainRateLimiter
+from common.sessions import get_session
+from get_scorecard import url, headers, extract_match_info, extract_batting_data, extract_bowling_data
+from scorecard_store import MalformedScorecard, add_store_options, normalize, open_store
+
+# matchstatus values for which there is nothing left to follow (yet)
+NOT_LIVE_STATUSES = {"not_started", "ended", "closed", "finished", "abandoned",
+                     "cancelled", "postponed", "interrupted", "delayed"}
+
+# fields that change on every poll without the score changing
+IGNORED_FIELDS = ("timestamp",)
+
+SECTIONS = {
+    "match": (extract_match_info, ("match_id",)),
+    "batting": (extract_batting_data, ("inning", "batsman")),
+    "bowling": (extract_bowling_data, ("inning", "bowler")),
+}
+
+
+def _rows(extract, data):
+    rows = extract(data)
+    if rows is None:
+        return []
+    return rows if isinstance(rows, list) else [rows]
+
+
+def _compared(row):
+    return {key: value for key, value in row.items() if key not in IGNORED_FIELDS}
+
+
+class ScorecardDiff:
+    """The last seen rows of each section, keyed by their identifying fields"""
+
+    def __init__(self):
+        self.previous = {section: {} for section in SECTIONS}
+
+    def update(self, data):
+        """Store the rows of data and return {section: [(change, row), ...]} for what differs"""
+        changes = {}
+        for section, (extract, key_fields) in SECTIONS.items():
+            current = {}
+            for row in _rows(extract, data):
+                current[tuple(row.get(field) for field in key_fields)] = row
+
+            previous = self.previous[section]
+            section_changes = []
+            for key, row in current.items():
+                if key not in previous:
+                    section_changes.append(("new", row))
+                elif _compared(previous[key]) != _compared(row):
+                    section_changes.append(("changed", row))
+            for key, row in previous.items():
+                if key not in current:
+                    section_changes.append(("removed", row))
+
+            self.previous[section] = current
+            if section_changes:
+                changes[section] = section_changes
+        return changes
+
+    def is_live(self):
+        rows = list(self.previous["match"].values())
+        status = str(rows[0].get("match_status", "")).strip().lower() if rows else ""
+        return status not in NOT_LIVE_STATUSES
+
+
+class ChangeWriter:
+    """Appends changed rows to one CSV per section, writing a header the first time"""
+
+    def __init__(self, prefix="cricket_scorecard"):
+        self.prefix = prefix
+        self.fieldnames = {}
+
+    def path(self, section):
+        return f"{self.prefix}_{section}.csv"
+
+    def write(self, changes, polled_at):
+        for section, section_changes in changes.items():
+            path = self.path(section)
+            fieldnames = self.fieldnames.get(section)
+            if fieldnames is None:
+                fieldnames = ["polled_at", "change"] + list(section_changes[0][1].keys())
+                if os.path.exists(path) and os.path.getsize(path):
+                    with open(path, newline="", encoding="utf-8") as f:
+                        fieldnames = next(csv.reader(f), fieldnames)
+                self.fieldnames[section] = fieldnames
+
+            new_file = not os.path.exists(path) or not os.path.getsize(path)
+            with open(path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+                if new_file:
+                    writer.writeheader()
+                for change, row in section_changes:
+                    writer.writerow({"polled_at": polled_at, "change": change, **row})
+
+
+class Backoff:
+    """Delay before the next poll: interval while live, doubling up to max_interval otherwise"""
+
+    def __init__(self, interval=15, max_interval=300, idle_polls=20):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.idle_polls = idle_polls
+        self.delay = interval
+        self.unchanged = 0
+
+    def next_delay(self, live, changed):
+        self.unchanged = 0 if changed else self.unchanged + 1
+        if live and self.unchanged < self.idle_polls:
+            self.delay = self.interval
+        else:
+            self.delay = min(self.delay * 2, self.max_interval)
+        return self.delay
+
+
+class MatchPoller:
+    """Diff, output and polling schedule of one match"""
+
+    def __init__(self, url, prefix="cricket_scorecard", interval=15, max_interval=300, idle_polls=20, label=None,
+                 store=None):
+        self.url = url
+        self.label = label
+        self.store = store
+        self.diff = ScorecardDiff()
+        self.writer = ChangeWriter(prefix)
+        self.backoff = Backoff(interval, max_interval, idle_polls)
+        self.etag = None
+        self.polls = 0
+
+    def handle(self, data):
+        """Record one poll's response (None if unchanged or failed) and return the delay until the next"""
+        self.polls += 1
+        changes = self.diff.update(data) if data else {}
+        if changes:
+            polled_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.writer.write(changes, polled_at)
+            label = f" {self.label}:" if self.label else ""
+            if self.store is not None:
+                try:
+                    self.store.append(normalize(data, match_id=self.label, polled_at=polled_at))
+                except MalformedScorecard as e:
+                    # one odd response shouldn't stop this match, or the others polled with it
+                    print(f"[{polled_at}]{label} not stored: {e}")
+            summary = ", ".join(f"{len(rows)} {section}" for section, rows in changes.items())
+            print(f"[{polled_at}]{label} {summary} row(s) changed")
+        return self.backoff.next_delay(self.diff.is_live(), bool(changes))
+
+
+def fetch(session, url, etag=None):
+    """(data, etag) for url; data is None when unchanged (304) or the request failed"""
+    try:
+        response = session.get(url, headers={"If-None-Match": etag} if etag else None, timeout=30)
+        if response.status_code == 304:
+            return None, etag
+        response.raise_for_status()
+        return response.json(), response.headers.get("ETag")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Request failed: {e}")
+        return None, etag
+
+
+def poll(url, prefix="cricket_scorecard", interval=15, max_interval=300, idle_polls=20,
+         max_polls=None, session=None, store=None):
+    session = session or get_session("sportradar", headers=headers)
+    match = MatchPoller(url, prefix, interval, max_interval, idle_polls, store=store)
+
+    while True:
+        data, match.etag = fetch(session, url, match.etag)
+        delay = match.handle(data)
+        if max_polls is not None and match.polls >= max_polls:
+            return
+        time.sleep(delay)
+
+
+def match_id(url):
+    found = re.search(r"/get_scorecard/(\d+)", url)
+    return found.group(1) if found else None
+
+
+def read_matches(path):
+    """[(match_id, url)] from a file of "<match id> <url>" or bare URL lines; # starts a comment"""
+    matches = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            if len(parts) == 1:
+                matches.append((match_id(parts[0]) or str(len(matches) + 1), parts[0]))
+            else:
+                matches.append((parts[0], parts[1]))
+    return matches
+
+
+async def fetch_async(session, url, etag=None, limiter=None):
+    """Asyncio version of fetch over a shared aiohttp session"""
+    if limiter:
+        await limiter.wait_async(url)
+    try:
+        async with session.get(url, headers={"If-None-Match": etag} if etag else None) as response:
+            if response.status == 304:
+                return None, etag
+            response.raise_for_status()
+            return await response.json(content_type=None), response.headers.get("ETag")
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        print(f"Request failed for {url}: {e!r}")
+        return None, etag
+
+
+async def poll_many_async(matches, prefix="cricket_scorecard", interval=15, max_interval=300, idle_polls=20,
+                          max_polls=None, per_host=4, rate=None, timeout=30, store=None):
+    """Poll every (match_id, url) in matches concurrently over one aiohttp session.
+
+    Each match keeps its own diff, output files (<prefix>_<match_id>_*.csv)
+    and backoff, so a finished match drops to max_interval while live ones
+    keep polling every interval. First polls are staggered across one
+    interval and at most per_host requests are in flight at once; rate
+    optionally caps the requests per second to the API host. Changed
+    scorecards are also appended to store when one is given.
+    """
+    limiter = DomainRateLimiter(rate=rate, burst=per_host) if rate else None
+    connector = aiohttp.TCPConnector(limit_per_host=per_host)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async with aiohttp.ClientSession(headers=headers, connector=connector, timeout=client_timeout) as session:
+        async def follow(position, match_id, url):
+            match = MatchPoller(url, f"{prefix}_{match_id}", interval, max_interval, idle_polls,
+                                label=match_id, store=store)
+            await asyncio.sleep(interval * position / len(matches))
+            while True:
+                data, match.etag = await fetch_async(session, url, match.etag, limiter)
+                delay = match.handle(data)
+                if max_polls is not None and match.polls >= max_polls:
+                    return
+                await asyncio.sleep(delay)
+
+        await asyncio.gather(*(follow(position, match_id, url)
+                               for position, (match_id, url) in enumerate(matches)))
+
+
+def poll_many(matches, **kwargs):
+    """Blocking wrapper around poll_many_async"""
+    asyncio.run(poll_many_async(matches, **kwargs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll a live scorecard and append only the rows that changed")
+    parser.add_argument("--url", default=url, help="scorecard URL (default: the one in get_scorecard.py)")
+    parser.add_argument("--prefix", default="cricket_scorecard",
+                        help="output files are <prefix>_match.csv, _batting.csv and _bowling.csv")
+    parser.add_argument("--interval", type=float, default=15,
+                        help="seconds between polls while the match is live (default: %(default)s)")
+    parser.add_argument("--max-interval", type=float, default=300,
+                        help="longest wait between polls once it is not (default: %(default)s)")
+    parser.add_argument("--idle-polls", type=int, default=20,
+                        help="unchanged polls in a row after which the match is treated as not live (default: %(default)s)")
+    parser.add_argument("--max-polls", type=int, help="stop after this many polls (per match)")
+    parser.add_argument("--matches", metavar="FILE",
+                        help='poll every match in FILE concurrently; one "<match id> <signed url>" (or just the url) per line')
+    parser.add_argument("--per-host", type=int, default=4,
+                        help="with --matches, most requests in flight at once (default: %(default)s)")
+    parser.add_argument("--rate", type=float,
+                        help="with --matches, most requests per second to the API (default: no limit)")
+    add_store_options(parser)
+    args = parser.parse_args()
+
+    store = open_store(args.sqlite, args.parquet)
+    try:
+        if args.matches:
+            poll_many(read_matches(args.matches), prefix=args.prefix, interval=args.interval,
+                      max_interval=args.max_interval, idle_polls=args.idle_polls, max_polls=args.max_polls,
+                      per_host=args.per_host, rate=args.rate, store=store)
+        else:
+            poll(args.url, args.prefix, args.interval, args.max_interval, args.idle_polls, args.max_polls,
+                 store=store)
+    except KeyboardInterrupt:
+        print("Stopped.")
+    finally:
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Serve recorded scorecard snapshots over HTTP, one per request, for testing poller.py.
+
+Each GET returns the next snapshot file in the order given and then keeps
+returning the last one (or starts over with --loop). A bare score payload
+such as live_scorecard.json is wrapped in the get_scorecard envelope, so the
+poller sees the same shape it gets from the live API. Responses carry an
+ETag and honour If-None-Match.
+
+    python replay_server.py snapshots/*.json --port 8765
+"""
+import argparse
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def load_snapshot(path, match_id="replay"):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "doc" not in data:
+        data = {"doc": [{"_id": match_id, "data": {"score": data}}]}
+    return json.dumps(data).encode("utf-8")
+
+
+class Replay:
+    def __init__(self, bodies, loop=False):
+        self.bodies = bodies
+        self.loop = loop
+        self.position = 0
+        self.lock = threading.Lock()
+
+    def next_body(self):
+        with self.lock:
+            body = self.bodies[self.position]
+            if self.position + 1 < len(self.bodies):
+                self.position += 1
+            elif self.loop:
+                self.position = 0
+            return body
+
+
+def make_handler(replay):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = replay.next_body()
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded scorecard snapshots one per request")
+    parser.add_argument("snapshots", nargs="+", help="snapshot JSON files, in the order they should be served")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--loop", action="store_true", help="start over after the last snapshot")
+    args = parser.parse_args()
+
+    replay = Replay([load_snapshot(path) for path in args.snapshots], args.loop)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(replay))
+    print(f"Serving {len(args.snapshots)} snapshot(s) on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
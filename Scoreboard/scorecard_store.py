@@ -0,0 +1,424 @@
+"""Normalize scorecard payloads into typed columnar batches and store them by match.
+
+normalize() walks a get_scorecard response (or a bare recorded score
+payload) once and returns three batches, match, batting and bowling, each a
+dict of column name -> list of values. Numbers are ints and floats, with
+None where the feed has no value, instead of the 'N/A' strings the CSV
+extractors write; strike rate and economy are computed when the feed
+leaves them out.
+
+Batches append to a SQLite database (one table per batch, indexed by
+match_id) or, with pyarrow installed, to a Parquet dataset partitioned as
+<dir>/<table>/match_id=<id>/. Every normalized payload gets a snapshot id,
+nanoseconds since the epoch made strictly increasing, since polls (and
+recorded files copied together) often share a polled_at second. Season
+totals are then single queries over the latest snapshot of every match:
+
+    python scorecard_store.py ingest live_scorecard.json --sqlite season.sqlite
+    python scorecard_store.py batting --sqlite season.sqlite --limit 20
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+SCHEMA = {
+    "match": [
+        ("match_id", "TEXT"), ("polled_at", "TEXT"), ("snapshot", "INTEGER"), ("match_title", "TEXT"),
+        ("series_name", "TEXT"), ("home_team", "TEXT"), ("away_team", "TEXT"), ("match_status", "TEXT"),
+        ("current_score", "TEXT"), ("current_over", "REAL"), ("run_rate", "REAL"), ("commentary", "TEXT"),
+    ],
+    "batting": [
+        ("match_id", "TEXT"), ("polled_at", "TEXT"), ("snapshot", "INTEGER"), ("inning", "INTEGER"),
+        ("batsman", "TEXT"), ("runs", "INTEGER"), ("balls", "INTEGER"), ("fours", "INTEGER"),
+        ("sixes", "INTEGER"), ("strike_rate", "REAL"), ("status", "TEXT"), ("bowler", "TEXT"),
+    ],
+    "bowling": [
+        ("match_id", "TEXT"), ("polled_at", "TEXT"), ("snapshot", "INTEGER"), ("inning", "INTEGER"),
+        ("bowler", "TEXT"), ("overs", "REAL"), ("balls", "INTEGER"), ("legal_balls", "INTEGER"),
+        ("maidens", "INTEGER"), ("runs", "INTEGER"), ("wickets", "INTEGER"), ("economy", "REAL"),
+    ],
+}
+
+
+def _int(value):
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value):
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value):
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _legal_balls(overs, balls):
+    """Balls bowled, from whole overs plus balls or from cricket notation like 9.3"""
+    if overs is None:
+        return None
+    whole = int(overs)
+    if balls is None:
+        balls = round((overs - whole) * 10)
+    return whole * 6 + balls
+
+
+_last_snapshot = 0
+
+
+def next_snapshot(at=None):
+    """A snapshot id: at (default: now) in nanoseconds since the epoch, but
+    always greater than the last one this process handed out"""
+    global _last_snapshot
+    _last_snapshot = max(at or time.time_ns(), _last_snapshot + 1)
+    return _last_snapshot
+
+
+def empty_batches():
+    return {table: {column: [] for column, _ in columns} for table, columns in SCHEMA.items()}
+
+
+class MalformedScorecard(ValueError):
+    """A payload that isn't shaped like a get_scorecard response or a score"""
+
+
+def normalize(data, match_id=None, polled_at=None, snapshot=None):
+    """{table: {column: [values]}} for one scorecard payload, in one pass.
+
+    Raises MalformedScorecard when data (or its doc or score) isn't a mapping,
+    or something inside it has the wrong shape.
+    """
+    try:
+        return _normalize(data, match_id, polled_at, snapshot)
+    except (AttributeError, TypeError, IndexError) as e:
+        raise MalformedScorecard(f"unexpected scorecard structure: {e}") from e
+
+
+def _normalize(data, match_id, polled_at, snapshot):
+    batches = empty_batches()
+    polled_at = polled_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    snapshot = snapshot or next_snapshot()
+
+    if not isinstance(data, dict):
+        raise MalformedScorecard(f"payload is a {type(data).__name__}, not an object")
+    if "doc" in data:
+        doc = (data.get("doc") or [{}])[0]
+        if not isinstance(doc, dict):
+            raise MalformedScorecard(f"doc[0] is a {type(doc).__name__}, not an object")
+        score = (doc.get("data") or {}).get("score") or {}
+        match_id = match_id or _text(doc.get("_id"))
+    else:
+        score = data
+    if not isinstance(score, dict):
+        raise MalformedScorecard(f"score is a {type(score).__name__}, not an object")
+    match_id = match_id or "unknown"
+
+    row = {
+        "match_id": match_id,
+        "polled_at": polled_at,
+        "snapshot": snapshot,
+        "match_title": _text(score.get("matchTitle")),
+        "series_name": _text(score.get("seriesName")),
+        "home_team": _text((score.get("home") or {}).get("name")),
+        "away_team": _text((score.get("away") or {}).get("name")),
+        "match_status": _text(score.get("matchstatus")),
+        "current_score": _text(score.get("currentScore")),
+        "current_over": _float(score.get("currentOver")),
+        "run_rate": _float(score.get("runRate")),
+        "commentary": _text(score.get("matchCommentary")),
+    }
+    for column, value in row.items():
+        batches["match"][column].append(value)
+
+    batting = batches["batting"]
+    bowling = batches["bowling"]
+    for position, inning in enumerate(score.get("innings") or [], 1):
+        inning_num = _int(inning.get("inningNumber")) or position
+
+        for batsman in (inning.get("batting") or {}).get("batsman") or inning.get("batsmen") or []:
+            runs = _int(batsman.get("runs"))
+            balls = _int(batsman.get("balls"))
+            strike_rate = _float(batsman.get("strikeRate"))
+            if strike_rate is None and runs is not None and balls:
+                strike_rate = round(runs * 100 / balls, 2)
+
+            batting["match_id"].append(match_id)
+            batting["polled_at"].append(polled_at)
+            batting["snapshot"].append(snapshot)
+            batting["inning"].append(inning_num)
+            batting["batsman"].append(_text(batsman.get("batsmanName")))
+            batting["runs"].append(runs)
+            batting["balls"].append(balls)
+            batting["fours"].append(_int(batsman.get("fours")))
+            batting["sixes"].append(_int(batsman.get("sixes")))
+            batting["strike_rate"].append(strike_rate)
+            batting["status"].append(_text(batsman.get("description")))
+            batting["bowler"].append(_text(batsman.get("bowlerName")))
+
+        for bowler in (inning.get("bowling") or {}).get("bowler") or inning.get("bowlers") or []:
+            overs = _float(bowler.get("overs"))
+            balls = _int(bowler.get("balls"))
+            runs = _int(bowler.get("runs"))
+            economy = _float(bowler.get("economy"))
+            legal_balls = _legal_balls(overs, balls)
+            if economy is None and runs is not None and legal_balls:
+                economy = round(runs * 6 / legal_balls, 2)
+
+            bowling["match_id"].append(match_id)
+            bowling["polled_at"].append(polled_at)
+            bowling["snapshot"].append(snapshot)
+            bowling["inning"].append(inning_num)
+            bowling["bowler"].append(_text(bowler.get("bowlerName")))
+            bowling["overs"].append(overs)
+            bowling["balls"].append(balls)
+            bowling["legal_balls"].append(legal_balls)
+            bowling["maidens"].append(_int(bowler.get("maidens")))
+            bowling["runs"].append(runs)
+            bowling["wickets"].append(_int(bowler.get("wickets")))
+            bowling["economy"].append(economy)
+
+    return batches
+
+
+# SQL for columns older databases lack but can derive; same rules as normalize()
+BACKFILL = {
+    "legal_balls": "CAST(overs AS INTEGER) * 6"
+                   " + COALESCE(balls, CAST(ROUND((overs - CAST(overs AS INTEGER)) * 10) AS INTEGER))",
+}
+
+
+def _rows(batch, columns):
+    return zip(*(batch[column] for column, _ in columns))
+
+
+class SqliteStore:
+    """Batches appended to one table each, indexed by (match_id, snapshot)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        for table, columns in SCHEMA.items():
+            definition = ", ".join(f"{column} {kind}" for column, kind in columns)
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definition})")
+            existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            for column, kind in columns:
+                if column not in existing:
+                    # databases written before the column existed
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+                    if column in BACKFILL:
+                        self.conn.execute(f"UPDATE {table} SET {column} = {BACKFILL[column]}")
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_snapshot ON {table} (match_id, snapshot)")
+        self.conn.commit()
+
+    def append(self, batches):
+        with self.conn:
+            for table, columns in SCHEMA.items():
+                names = ", ".join(column for column, _ in columns)
+                placeholders = ", ".join("?" for _ in columns)
+                self.conn.executemany(f"INSERT INTO {table} ({names}) VALUES ({placeholders})",
+                                      _rows(batches[table], columns))
+
+    def query(self, sql, params=()):
+        cursor = self.conn.execute(sql, params)
+        columns = [description[0] for description in cursor.description]
+        return columns, cursor.fetchall()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetStore:
+    """Batches written as Parquet files under <directory>/<table>/match_id=<id>/"""
+
+    TYPES = {"TEXT": "string", "INTEGER": "int64", "REAL": "float64"}
+
+    def __init__(self, directory):
+        try:
+            import pyarrow
+            import pyarrow.compute
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("The Parquet store needs pyarrow: pip install pyarrow")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.directory = directory
+        self.schemas = {
+            table: pyarrow.schema([(column, self.TYPES[kind]) for column, kind in columns])
+            for table, columns in SCHEMA.items()
+        }
+
+    def append(self, batches):
+        for table, batch in batches.items():
+            if not batch["match_id"]:
+                continue
+            arrow_table = self.pa.Table.from_pydict(batch, schema=self.schemas[table])
+            for match_id in sorted(set(batch["match_id"])):
+                part = arrow_table.filter(self.pa.compute.equal(arrow_table["match_id"], match_id))
+                directory = os.path.join(self.directory, table, f"match_id={_partition(match_id)}")
+                os.makedirs(directory, exist_ok=True)
+                name = f"{part['snapshot'][0].as_py()}-{os.getpid()}-{len(os.listdir(directory))}.parquet"
+                self.pq.write_table(part, os.path.join(directory, name))
+
+    def table(self, table):
+        """Everything stored for table, as one pyarrow Table"""
+        import pyarrow.dataset
+        dataset = pyarrow.dataset.dataset(os.path.join(self.directory, table), format="parquet",
+                                          schema=self.schemas[table])
+        return dataset.to_table()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _partition(match_id):
+    return re.sub(r"[^\w.:-]", "_", match_id)
+
+
+def open_store(sqlite_path=None, parquet_dir=None):
+    """The store asked for on the command line, or None"""
+    if sqlite_path:
+        return SqliteStore(sqlite_path)
+    if parquet_dir:
+        return ParquetStore(parquet_dir)
+    return None
+
+
+def add_store_options(parser):
+    parser.add_argument("--sqlite", metavar="PATH", help="append normalized scorecards to this SQLite database")
+    parser.add_argument("--parquet", metavar="DIR",
+                        help="append normalized scorecards to a Parquet dataset in DIR, partitioned by match (needs pyarrow)")
+    return parser
+
+
+# totals over the latest snapshot stored for every match
+TOTALS = {
+    "batting": """
+        WITH latest AS (SELECT match_id, MAX(snapshot) AS snapshot FROM batting GROUP BY match_id)
+        SELECT batsman, COUNT(*) AS innings, SUM(runs) AS runs, SUM(balls) AS balls,
+               SUM(fours) AS fours, SUM(sixes) AS sixes,
+               ROUND(100.0 * SUM(runs) / NULLIF(SUM(balls), 0), 2) AS strike_rate
+        FROM batting JOIN latest USING (match_id, snapshot)
+        GROUP BY batsman ORDER BY runs DESC LIMIT ?""",
+    "bowling": """
+        WITH latest AS (SELECT match_id, MAX(snapshot) AS snapshot FROM bowling GROUP BY match_id)
+        SELECT bowler, COUNT(*) AS innings,
+               SUM(legal_balls) AS balls,
+               SUM(maidens) AS maidens, SUM(runs) AS runs, SUM(wickets) AS wickets,
+               ROUND(6.0 * SUM(runs) / NULLIF(SUM(legal_balls), 0), 2) AS economy
+        FROM bowling JOIN latest USING (match_id, snapshot)
+        GROUP BY bowler ORDER BY wickets DESC, economy ASC LIMIT ?""",
+}
+
+
+def totals(store, table, limit=20):
+    """(columns, rows) of season totals per player from the latest snapshot of every match"""
+    if isinstance(store, SqliteStore):
+        return store.query(TOTALS[table], (limit,))
+
+    # the same totals, computed with pyarrow over the dataset
+    pa = store.pa
+    data = store.table(table)
+    latest = data.group_by("match_id").aggregate([("snapshot", "max")]).rename_columns(["match_id", "snapshot"])
+    data = data.join(latest, ["match_id", "snapshot"], join_type="inner")
+    if table == "batting":
+        grouped = data.group_by("batsman").aggregate([
+            ("batsman", "count"), ("runs", "sum"), ("balls", "sum"), ("fours", "sum"), ("sixes", "sum")])
+        grouped = grouped.append_column("strike_rate", pa.compute.round(pa.compute.divide(
+            pa.compute.multiply(pa.compute.cast(grouped["runs_sum"], pa.float64()), 100.0), grouped["balls_sum"]), 2))
+        columns = ["batsman", "innings", "runs", "balls", "fours", "sixes", "strike_rate"]
+        order = [("runs_sum", "descending")]
+        selected = ["batsman", "batsman_count", "runs_sum", "balls_sum", "fours_sum", "sixes_sum", "strike_rate"]
+    else:
+        # files written before legal_balls was stored get it derived like normalize() does
+        whole = pa.compute.floor(data["overs"])
+        extra = pa.compute.cast(pa.compute.round(pa.compute.multiply(pa.compute.subtract(data["overs"], whole), 10)),
+                                pa.int64())
+        derived = pa.compute.add(pa.compute.multiply(pa.compute.cast(whole, pa.int64()), 6),
+                                 pa.compute.coalesce(data["balls"], extra))
+        data = data.set_column(data.schema.get_field_index("legal_balls"), "legal_balls",
+                               pa.compute.coalesce(data["legal_balls"], derived))
+        grouped = data.group_by("bowler").aggregate([
+            ("bowler", "count"), ("legal_balls", "sum"), ("maidens", "sum"), ("runs", "sum"), ("wickets", "sum")])
+        grouped = grouped.append_column("economy", pa.compute.round(pa.compute.divide(
+            pa.compute.multiply(pa.compute.cast(grouped["runs_sum"], pa.float64()), 6.0), grouped["legal_balls_sum"]), 2))
+        columns = ["bowler", "innings", "balls", "maidens", "runs", "wickets", "economy"]
+        order = [("wickets_sum", "descending"), ("economy", "ascending")]
+        selected = ["bowler", "bowler_count", "legal_balls_sum", "maidens_sum", "runs_sum", "wickets_sum", "economy"]
+    grouped = grouped.select(selected).sort_by(order).slice(0, limit)
+    return columns, [tuple(row.values()) for row in grouped.to_pylist()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store normalized scorecards and query season totals")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = add_store_options(commands.add_parser("ingest", help="normalize recorded scorecard JSON files into a store"))
+    ingest.add_argument("files", nargs="+")
+    ingest.add_argument("--match-id", help="match id for bare score payloads (default: the file name)")
+
+    for table in TOTALS:
+        query = add_store_options(commands.add_parser(table, help=f"season {table} totals per player"))
+        query.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args()
+    store = open_store(args.sqlite, args.parquet)
+    if store is None:
+        parser.error("one of --sqlite or --parquet is required")
+
+    with store:
+        if args.command == "ingest":
+            stored = 0
+            # oldest first; files with the same mtime keep their command line order
+            for path in sorted(args.files, key=lambda path: os.stat(path).st_mtime_ns):
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                match_id = args.match_id or os.path.splitext(os.path.basename(path))[0]
+                mtime_ns = os.stat(path).st_mtime_ns
+                polled_at = datetime.fromtimestamp(mtime_ns / 1e9).strftime("%Y-%m-%d %H:%M:%S")
+                try:
+                    batches = normalize(data, match_id=None if isinstance(data, dict) and "doc" in data else match_id,
+                                        polled_at=polled_at, snapshot=next_snapshot(mtime_ns))
+                except MalformedScorecard as e:
+                    print(f"Skipped {path}: {e}")
+                    continue
+                store.append(batches)
+                stored += 1
+            print(f"Stored {stored} scorecard(s).")
+        else:
+            columns, rows = totals(store, args.command, args.limit)
+            print("\t".join(columns))
+            for row in rows:
+                print("\t".join("" if value is None else str(value) for value in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,41 @@
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
 import json
-import time
-import random
-import re
 from datetime import datetime
 import pytz  
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.checkpoint import open_checkpoint
+from common.cli import open_http_cache, scraper_args
+from common.fetch import fetch_all
+from common.headmeta import scan_head
+from common.output import open_output
+from common.parsers import Targets, parse_html
+from common.ratelimit import DomainRateLimiter
+from common.sessions import get_session
+
+# outermost elements parse_wsj_article reads from the body; the rest of the page is never built
+PARSE_TARGETS = Targets(
+    "h2",
+    "span.css-426zcb-CaptionSpan",
+    "section.css-1lhnhkw-Container",
+)
+
+# added to PARSE_TARGETS only for the fields scan_head() could not supply
+TITLE_TARGETS = ("h1", "div.css-bsrkcm-Box.e1vnmyci0")
+DATE_TARGETS = ('script[type="application/ld+json"]',)
+IMAGE_TARGETS = ("picture.css-u314cv",)
+
 def load_browser_cookies(filepath):
     with open(filepath, "r") as f:
         raw_cookies = json.load(f)
     return {cookie["name"]: cookie["value"] for cookie in raw_cookies}
 
 
-def extract_date_from_ld_json(soup):
-    for script in soup.find_all("script", type="application/ld+json"):
+def extract_date_from_ld_json(doc):
+    for script in doc.select('script[type="application/ld+json"]'):
         try:
-            data = json.loads(script.string)
+            data = json.loads(script.text())
             if isinstance(data, list):
                 for entry in data:
                     if isinstance(entry, dict) and "datePublished" in entry:
@@ -38,52 +57,78 @@ def convert_iso_to_et(iso_string):
         return iso_string  # fallback
 
 def scrape_wsj_article(url, cookies, headers):
-    response = requests.get(url, headers=headers, cookies=cookies)
+    response = get_session("wsj", headers=headers, cookies=cookies).get(url)
     if response.status_code != 200:
         print(f"❌ Failed to fetch {url}. Status code: {response.status_code}")
         return None
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    return parse_wsj_article(url, response.text)
+
+def parse_wsj_article(url, html):
+    # headline, date and lead image come from the <head> scan; the DOM is
+    # only built for the body, plus whichever of those the head lacked
+    head = scan_head(html)
+    headline = head.ld_value("headline")
+    headline = headline.strip() if isinstance(headline, str) and headline.strip() else None
+    date_published = head.ld_value("datePublished")
+    og_image = head.get("og:image")
+
+    selectors = PARSE_TARGETS.selectors
+    if headline is None:
+        selectors += TITLE_TARGETS
+    if date_published is None:
+        selectors += DATE_TARGETS
+    if not og_image:
+        selectors += IMAGE_TARGETS
+    doc = parse_html(html, only=Targets(*selectors))
 
     # Title
-    title_tag = soup.find("h1", {"data-testid": "headline"}) or \
-                soup.select_one("div.css-bsrkcm-Box.e1vnmyci0 h1") or \
-                soup.find("h1", class_=re.compile("StyledHeadline"))
-    title = title_tag.get_text(strip=True) if title_tag else "No title found"
-    published_date = extract_date_from_ld_json(soup)
+    if headline is not None:
+        title = headline
+    else:
+        title_tag = doc.select_one('h1[data-testid="headline"]') or \
+                    doc.select_one("div.css-bsrkcm-Box.e1vnmyci0 h1") or \
+                    doc.select_one('h1[class*="StyledHeadline"]')
+        title = title_tag.text(strip=True) if title_tag else "No title found"
+
+    # Date
+    if date_published is not None:
+        published_date = convert_iso_to_et(date_published)
+    else:
+        published_date = extract_date_from_ld_json(doc)
 
     # Dek
-    dek_block = soup.find("h2", {"data-testid": "dek-block"}) or \
-                soup.find("h2", class_=re.compile("NormalDek"))
-    dek = dek_block.get_text(strip=True) if dek_block else "No dek found"
+    dek_block = doc.select_one('h2[data-testid="dek-block"]') or \
+                doc.select_one('h2[class*="NormalDek"]')
+    dek = dek_block.text(strip=True) if dek_block else "No dek found"
 
     # Subheadline
-    caption_span = soup.find("span", class_="css-426zcb-CaptionSpan")
-    subheadline = caption_span.get_text(strip=True) if caption_span else "No subheadline found"
+    caption_span = doc.select_one("span.css-426zcb-CaptionSpan")
+    subheadline = caption_span.text(strip=True) if caption_span else "No subheadline found"
 
     # Image
-    image_url = "No image found"
-    img_tag = soup.find("picture", class_="css-u314cv")
+    image_url = og_image or "No image found"
+    img_tag = None if og_image else doc.select_one("picture.css-u314cv")
     if img_tag:
-        img = img_tag.find("img")
+        img = img_tag.select_one("img")
         if img and img.has_attr("srcset"):
-            srcset_urls = [entry.split()[0] for entry in img["srcset"].split(",")]
+            srcset_urls = [entry.split()[0] for entry in img.get("srcset").split(",")]
             image_url = srcset_urls[-1] if srcset_urls else img.get("src", "No image found")
         elif img and img.get("src"):
-            image_url = img["src"]
+            image_url = img.get("src")
 
     # Article text
-    article_section = soup.find("section", class_="css-1lhnhkw-Container")
+    article_section = doc.select_one("section.css-1lhnhkw-Container")
 
     article_text = ""
     if article_section:
-        paragraphs = article_section.find_all("p", {"data-testid": "paragraph"})
+        paragraphs = article_section.select('p[data-testid="paragraph"]')
         
         if not paragraphs:
-            paragraphs = article_section.find_all("p")
+            paragraphs = article_section.select("p")
 
         article_text = "\n".join(
-            p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)
+            p.text(strip=True) for p in paragraphs if p.text(strip=True)
         )
     else:
         article_text = "No article content found"
@@ -100,6 +145,7 @@ def scrape_wsj_article(url, cookies, headers):
     }
 
 def main():
+    args = scraper_args("Scrape WSJ articles listed in wsj_urls.txt").parse_args()
     cookies = load_browser_cookies("cookie.json")
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
@@ -114,18 +160,29 @@ def main():
     with open("wsj_urls.txt", "r") as f:
         urls = [line.strip() for line in f if line.strip()]
 
-    all_articles = []
-    for url in urls:
-        print(f"Scraping {url} ...")
-        article_data = scrape_wsj_article(url, cookies, headers)
-        if article_data:
-            all_articles.append(article_data)
-        time.sleep(random.uniform(1, 3))
-
-    with open("wsj_articles.json", "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=4)
-
-    print(f"Done. Scraped {len(all_articles)} articles and saved to wsj_articles.json")
+    # about one request every 2-3s per host, other hosts proceed in parallel
+    limiter = DomainRateLimiter(rate=0.5, jitter=1.0)
+
+    checkpoint = open_checkpoint("wsj_articles.json", jsonl=args.jsonl, resume=args.resume)
+    todo = checkpoint.pending(urls)
+    if args.resume:
+        print(f"Resuming: {len(urls) - len(todo)} URLs already done")
+
+    with checkpoint, open_output("wsj_articles.json", jsonl=args.jsonl, indent=4,
+                                 fsync_every=args.fsync_every, order=urls, resume=args.resume) as output:
+        def handle_response(url, status, html):
+            if status != 200:
+                print(f"❌ Failed to fetch {url}. Status code: {status}")
+                checkpoint.mark_failed(url, f"HTTP {status}")
+                return
+            print(f"Scraped {url}")
+            checkpoint.mark_done(url, output.write(parse_wsj_article(url, html)))
+
+        print(f"Scraping {len(todo)} URLs ...")
+        fetch_all(todo, handle_response, cookies=cookies, headers=headers, limiter=limiter,
+                  cache=open_http_cache(args))
+
+    print(f"Done. Scraped {output.count} articles and saved to {output.path}")
 
 if __name__ == "__main__":
     main()
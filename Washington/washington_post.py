@@ -1,72 +1,134 @@
 from datetime import datetime
+from functools import partial
 import json
-from bs4 import BeautifulSoup
+import os
+import sys
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.common.exceptions import WebDriverException
 
-def extract_article(driver, url):
-    try:
-        driver.get(url)
-        
-        wait = WebDriverWait(driver, 15)
-        try:
-            wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, 'h1[data-qa="headline"], h1[data-testid="headline"], div[data-qa="article-body"]')
-                )
-            )
-        except TimeoutException:
-            print(f"Timeout waiting for page content at {url}")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.checkpoint import open_checkpoint
+from common.cli import embedded_args, fetch_args, open_http_cache, readiness_args, scraper_args
+from common.embedded import dig, element_texts, script_json, with_fallback
+from common.hybrid import http_first
+from common.output import open_output
+from common.parsers import parse_html
+from common.ratelimit import DomainRateLimiter
+from common.readiness import Readiness
+from common.selenium_pool import run_with_drivers
 
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+# one headless Chrome per worker process
+WORKERS = os.cpu_count() or 2
 
-        # HEADLINE
-        headline = soup.select_one('h1[data-qa="headline"], h1[data-testid="headline"]')
-        headline_text = headline.get_text(strip=True) if headline else "N/A"
+READY = Readiness(['h1[data-qa="headline"]', 'h1[data-testid="headline"]', 'div[data-qa="article-body"]'], timeout=15)
 
-        # DATE
-        date_tag = soup.select_one('span[data-testid="display-date"]') or soup.select_one('span[data-testid="published-date"]')
-        date_text = date_tag.get_text(strip=True) if date_tag else "N/A"
+def initialize_browser():
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
 
+    # Set a common user agent to avoid bot blocking
+    chrome_options.add_argument(
+        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+    )
+    # READY waits for the article itself, no need to wait for every subresource
+    chrome_options.page_load_strategy = "eager"
 
-        # SUBHEADING
-        subheading = soup.select_one('p[data-qa="subheadline"], p[data-testid="subheadline"]')
-        subheading_text = subheading.get_text(strip=True) if subheading else "N/A"
+    return webdriver.Chrome(options=chrome_options)
 
-        # ARTICLE BODY
-        article_paragraphs = soup.select('div[data-qa="article-body"] p')
-        article_text = "\n\n".join(p.get_text(strip=True) for p in article_paragraphs if p.get_text(strip=True)) or "N/A"
+def extract_article(driver, url, embedded=False):
+    try:
+        if READY.load(driver, url) == "timeout":
+            print(f"Timeout waiting for page content at {url}")
 
-        # IMAGE
-        image_tag = soup.select_one('img.w-100.mw-100.h-auto')
-        if image_tag:
-            srcset = image_tag.get('srcset')
-            if srcset:
-                image_url = srcset.split()[0]
-            else:
-                image_url = image_tag.get('src')
-        else:
-            og_image = soup.find('meta', property='og:image')
-            image_url = og_image['content'] if og_image else None
-
-        return {
-            "url": url,
-            "headline": headline_text,
-            "date": date_text,
-            "subheading": subheading_text,
-            "article": article_text,
-            "image": image_url
-        }
+        return parse_article(driver.page_source, url, embedded)
 
     except WebDriverException as e:
         print(f"WebDriverException while loading {url}: {e}")
     except Exception as e:
         print(f"Failed to process {url}: {e}")
 
+    return empty_article(url)
+
+
+def parse_article(html, url, embedded=False):
+    if embedded:
+        article_data = parse_article_json(html, url)
+        if article_data:
+            return with_fallback(article_data, lambda: parse_article_html(html, url))
+    return parse_article_html(html, url)
+
+
+def parse_article_html(html, url):
+    doc = parse_html(html)
+
+    # HEADLINE
+    headline = doc.select_one('h1[data-qa="headline"], h1[data-testid="headline"]')
+    headline_text = headline.text(strip=True) if headline else "N/A"
+
+    # DATE
+    date_tag = doc.select_one('span[data-testid="display-date"]') or doc.select_one('span[data-testid="published-date"]')
+    date_text = date_tag.text(strip=True) if date_tag else "N/A"
+
+
+    # SUBHEADING
+    subheading = doc.select_one('p[data-qa="subheadline"], p[data-testid="subheadline"]')
+    subheading_text = subheading.text(strip=True) if subheading else "N/A"
+
+    # ARTICLE BODY
+    article_paragraphs = doc.select('div[data-qa="article-body"] p')
+    article_text = "\n\n".join(p.text(strip=True) for p in article_paragraphs if p.text(strip=True)) or "N/A"
+
+    # IMAGE
+    image_tag = doc.select_one('img.w-100.mw-100.h-auto')
+    if image_tag:
+        srcset = image_tag.get('srcset')
+        if srcset:
+            image_url = srcset.split()[0]
+        else:
+            image_url = image_tag.get('src')
+    else:
+        og_image = doc.select_one('meta[property="og:image"]')
+        image_url = og_image.get('content') if og_image else None
+
+    return {
+        "url": url,
+        "headline": headline_text,
+        "date": date_text,
+        "subheading": subheading_text,
+        "article": article_text,
+        "image": image_url
+    }
+
+
+# Same fields from the Arc article document in __NEXT_DATA__, or None when
+# the page doesn't carry it
+def parse_article_json(html, url):
+    article = dig(script_json(html, "__NEXT_DATA__"), "props", "pageProps", "globalContent")
+    if not isinstance(article, dict):
+        return None
+
+    return {
+        "url": url,
+        "headline": dig(article, "headlines", "basic"),
+        "date": article.get("display_date") or article.get("first_publish_date"),
+        "subheading": dig(article, "subheadlines", "basic"),
+        "article": "\n\n".join(element_texts(article.get("content_elements"))),
+        "image": dig(article, "promo_items", "basic", "url")
+    }
+
+
+def load_browser_cookies(filepath):
+    with open(filepath, "r") as f:
+        raw_cookies = json.load(f)
+    return {cookie["name"]: cookie["value"] for cookie in raw_cookies}
+
+
+def empty_article(url):
     return {
         "url": url,
         "headline": "N/A",
@@ -78,6 +140,8 @@ def extract_article(driver, url):
 
 
 def main():
+    args = fetch_args(readiness_args(embedded_args(scraper_args(
+        "Scrape Washington Post articles listed in washington_post.txt")))).parse_args()
     start_time = datetime.now()
     print("Started at:", start_time.strftime("%Y-%m-%d %I:%M:%S %p"))
 
@@ -87,32 +151,45 @@ def main():
     with open("washington_post.txt", "r", encoding="utf-8") as file:
         urls = [line.strip() for line in file if line.strip()]
 
-    all_articles = []
-
-    chrome_options = Options()
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-
-    # Set a common user agent to avoid bot blocking
-    chrome_options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
-    )
-
-    driver = webdriver.Chrome(options=chrome_options)
-
-    try:
-        for url in urls:
-            print(f"Processing: {url}")
-            article_data = extract_article(driver, url)
-            all_articles.append(article_data)
-
-    finally:
-        driver.quit()
-
-    with open("washington_post_output.json", "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    checkpoint = open_checkpoint("washington_post_output.json", jsonl=args.jsonl, resume=args.resume)
+    todo = checkpoint.pending(urls)
+    if args.resume:
+        print(f"Resuming: {len(urls) - len(todo)} URLs already done")
+
+    with checkpoint, open_output("washington_post_output.json", jsonl=args.jsonl,
+                                 fsync_every=args.fsync_every, order=urls, resume=args.resume) as output:
+        def save(url, article_data):
+            offset = output.write(article_data)
+            if article_data["headline"] == "N/A":
+                checkpoint.mark_failed(url, "no headline")
+            else:
+                checkpoint.mark_done(url, offset)
+
+        def save_http(url, html):
+            article_data = parse_article(html, url, args.embedded_json)
+            # a page without a headline gets another chance in the browser
+            if article_data["headline"] == "N/A" and args.fetch == "hybrid":
+                return False
+            print(f"Processed over HTTP: {url}")
+            save(url, article_data)
+
+        # cookies exported from a logged-in browser, as washington_request uses, if there are any
+        cookies = load_browser_cookies("cookie.json") if os.path.exists("cookie.json") else None
+        todo = http_first(todo, READY.selectors, save_http, mode=args.fetch, cookies=cookies,
+                          limiter=DomainRateLimiter(rate=0.5, jitter=1.0), cache=open_http_cache(args))
+
+        if args.fetch == "http":
+            for url in todo:
+                save(url, empty_article(url))
+            todo = []
+        elif todo:
+            print(f"{len(todo)} URLs need the browser")
+
+        task = partial(extract_article, embedded=args.embedded_json)
+        # results come back in the same order as todo
+        for url, article_data in zip(todo, run_with_drivers(todo, task, initialize_browser, processes=WORKERS)):
+            print(f"Processed: {url}")
+            save(url, article_data or empty_article(url))
 
     end_time = datetime.now()
     print("Finished at:", end_time.strftime("%Y-%m-%d %I:%M:%S %p"))
@@ -0,0 +1,5 @@
+"""Shared helpers for the site scrapers in this repo.
+
+Each scraper lives in its own dated/site folder and is run from there, so
+scripts put the repo root on ``sys.path`` before importing from here.
+"""
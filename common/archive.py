@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import zstandard
+
+
+class HtmlArchive:
+    """Content-addressed store of raw page HTML.
+
+    Each distinct page body is zstd-compressed once into
+    objects/<sha[:2]>/<sha>.zst, and every capture appends a line
+    {"url", "sha256", "size", "fetched_at"} to index.jsonl. put() only
+    queues the work; hashing, compression and disk writes happen on a
+    background thread so the scraper's hot path never waits on them.
+    """
+
+    def __init__(self, directory, level=3):
+        self.directory = directory
+        self.level = level
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self._writer = ThreadPoolExecutor(max_workers=1)
+
+    def _object_path(self, sha):
+        return os.path.join(self.directory, "objects", sha[:2], sha + ".zst")
+
+    def _write(self, url, html, fetched_at):
+        data = html.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._object_path(sha)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(zstandard.ZstdCompressor(level=self.level).compress(data))
+                os.replace(tmp, path)
+
+            entry = {"url": url, "sha256": sha, "size": len(data), "fetched_at": fetched_at}
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Failed to archive {url}: {e}")
+
+    def put(self, url, html):
+        """Queue html as the latest capture of url"""
+        fetched_at = datetime.now().isoformat(timespec="seconds")
+        self._writer.submit(self._write, url, html, fetched_at)
+
+    def get(self, sha):
+        with open(self._object_path(sha), "rb") as f:
+            return zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+
+    def entries(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_latest(self, urls=None):
+        """(url, html) for the most recent capture of every archived URL,
+        or only of urls if given, in the order they were first archived"""
+        latest = {}
+        for entry in self.entries():
+            if urls is None or entry["url"] in urls:
+                latest[entry["url"]] = entry["sha256"]
+        for url, sha in latest.items():
+            yield url, self.get(sha)
+
+    def close(self):
+        """Wait for queued writes to finish"""
+        self._writer.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,188 @@
+import json
+from collections import Counter
+from urllib.parse import urlsplit
+
+# Playwright resource types that never matter when only the HTML DOM is parsed
+DEFAULT_BLOCKED_TYPES = {"image", "media", "font"}
+
+# ad, tracking and analytics hosts seen on the news sites we scrape
+DEFAULT_BLOCKED_DOMAINS = {
+    "doubleclick.net", "googlesyndication.com", "googletagservices.com",
+    "googletagmanager.com", "google-analytics.com", "adservice.google.com",
+    "amazon-adsystem.com", "adnxs.com", "criteo.com", "criteo.net",
+    "pubmatic.com", "rubiconproject.com", "openx.net", "casalemedia.com",
+    "taboola.com", "outbrain.com", "scorecardresearch.com", "chartbeat.com",
+    "chartbeat.net", "quantserve.com", "moatads.com", "facebook.net",
+    "hotjar.com", "newrelic.com", "nr-data.net", "permutive.com",
+    "krxd.net", "bluekai.com", "everesttech.net", "adsrvr.org",
+}
+
+# file extensions Chrome's Network.setBlockedURLs can match for each type
+TYPE_URL_PATTERNS = {
+    "image": ["*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"],
+    "media": ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.ts?*"],
+    "font": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"],
+    "stylesheet": ["*.css*"],
+}
+
+# rough transfer sizes, used to estimate what a blocked request would have cost
+ESTIMATED_BYTES = {
+    "image": 60_000,
+    "media": 400_000,
+    "font": 35_000,
+    "stylesheet": 40_000,
+    "script": 50_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "other": 10_000,
+}
+
+
+def base_domain(host):
+    """Last two labels of a host name, good enough to tell first from third party"""
+    return ".".join(host.lower().split(".")[-2:])
+
+
+class BlockPolicy:
+    """Which requests a browser scraper should refuse to load.
+
+    resource_types are Playwright resource types to drop, domains are hosts
+    (and their subdomains) to drop whatever they serve, and block_third_party
+    drops every non-document request outside the page's own domain.
+    """
+
+    def __init__(self, resource_types=DEFAULT_BLOCKED_TYPES, domains=DEFAULT_BLOCKED_DOMAINS,
+                 block_third_party=False):
+        self.resource_types = set(resource_types)
+        self.domains = set(domains)
+        self.block_third_party = block_third_party
+
+    def _blocked_domain(self, host):
+        parts = host.lower().split(".")
+        return any(".".join(parts[i:]) in self.domains for i in range(len(parts) - 1))
+
+    def should_block(self, url, resource_type, page_url=None):
+        if resource_type == "document":
+            return False
+        if resource_type in self.resource_types:
+            return True
+
+        host = urlsplit(url).hostname or ""
+        if self._blocked_domain(host):
+            return True
+        if self.block_third_party and page_url:
+            page_host = urlsplit(page_url).hostname or ""
+            return base_domain(host) != base_domain(page_host)
+        return False
+
+    def url_patterns(self):
+        """The policy as Chrome URL patterns, for CDP Network.setBlockedURLs"""
+        patterns = [f"*{domain}*" for domain in sorted(self.domains)]
+        for resource_type in sorted(self.resource_types):
+            patterns.extend(TYPE_URL_PATTERNS.get(resource_type, []))
+        return patterns
+
+
+class BlockStats:
+    """Per page counters of blocked requests and the bytes they would have cost"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.blocked = Counter()
+        self.loaded_bytes = 0
+
+    def record_blocked(self, resource_type):
+        self.blocked[resource_type] += 1
+
+    def record_response(self, response):
+        """Playwright response listener, counts the declared body size"""
+        try:
+            self.loaded_bytes += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+    @property
+    def saved_bytes(self):
+        return sum(ESTIMATED_BYTES.get(t, ESTIMATED_BYTES["other"]) * n for t, n in self.blocked.items())
+
+    def summary(self, url):
+        kinds = ", ".join(f"{n} {t}" for t, n in self.blocked.most_common()) or "nothing"
+        return (f"Blocked {kinds} on {url} "
+                f"(~{self.saved_bytes / 1024:.0f} KB saved, {self.loaded_bytes / 1024:.0f} KB loaded)")
+
+
+def install_route_blocking(page, policy):
+    """Abort requests on a sync Playwright page according to policy, returns its BlockStats"""
+    stats = BlockStats()
+
+    def handle(route):
+        request = route.request
+        if policy.should_block(request.url, request.resource_type, page.url):
+            stats.record_blocked(request.resource_type)
+            route.abort()
+        else:
+            route.continue_()
+
+    page.route("**/*", handle)
+    page.on("response", stats.record_response)
+    return stats
+
+
+async def install_route_blocking_async(page, policy):
+    """install_route_blocking for an async Playwright page"""
+    stats = BlockStats()
+
+    async def handle(route):
+        request = route.request
+        if policy.should_block(request.url, request.resource_type, page.url):
+            stats.record_blocked(request.resource_type)
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", handle)
+    page.on("response", stats.record_response)
+    return stats
+
+
+def enable_performance_log(chrome_options):
+    """Turn on Chrome's performance log so cdp_page_report can read network events"""
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return chrome_options
+
+
+def install_cdp_blocking(driver, policy):
+    """Block policy URLs in a Selenium Chrome driver through the DevTools protocol.
+
+    CDP only matches URL patterns, so resource types are blocked by file
+    extension and third-party blocking is not available here.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": policy.url_patterns()})
+
+
+def cdp_page_report(driver):
+    """BlockStats for everything since the last call, read from the performance log.
+
+    Needs enable_performance_log() on the driver's options; returns empty
+    stats otherwise.
+    """
+    stats = BlockStats()
+    types = {}
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return stats
+
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        method, params = message.get("method"), message.get("params", {})
+        if method == "Network.requestWillBeSent":
+            types[params.get("requestId")] = (params.get("type") or "other").lower()
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            stats.record_blocked(types.get(params.get("requestId"), (params.get("type") or "other").lower()))
+        elif method == "Network.loadingFinished":
+            stats.loaded_bytes += int(params.get("encodedDataLength", 0))
+    return stats
@@ -0,0 +1,87 @@
+import sqlite3
+from datetime import datetime
+
+from common.output import jsonl_path
+
+
+class Checkpoint:
+    """Per-URL progress of a scraper run, kept in a small SQLite file.
+
+    Each URL is stored with its status ("done" or "failed"), the number of
+    attempts so far and, for URLs written to a JSONL output, the byte offset
+    its record starts at.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS progress ("
+            " url TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " output_offset INTEGER,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT,"
+            " updated_at TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def reset(self):
+        self.conn.execute("DELETE FROM progress")
+        self.conn.commit()
+
+    def completed(self):
+        return {row[0] for row in self.conn.execute("SELECT url FROM progress WHERE status = 'done'")}
+
+    def pending(self, urls):
+        """urls that still need scraping: failed ones and ones never attempted"""
+        done = self.completed()
+        return [url for url in urls if url not in done]
+
+    def _record(self, url, status, offset=None, error=None):
+        self.conn.execute(
+            "INSERT INTO progress (url, status, output_offset, attempts, error, updated_at)"
+            " VALUES (?, ?, ?, 1, ?, ?)"
+            " ON CONFLICT(url) DO UPDATE SET status = excluded.status,"
+            " output_offset = excluded.output_offset, attempts = attempts + 1,"
+            " error = excluded.error, updated_at = excluded.updated_at",
+            (url, status, offset, error, datetime.now().isoformat(timespec="seconds")),
+        )
+        # commit per URL so an interrupted run loses at most the page in flight
+        self.conn.commit()
+
+    def mark_done(self, url, offset=None):
+        self._record(url, "done", offset=offset)
+
+    def mark_failed(self, url, error=None):
+        self._record(url, "failed", error=str(error) if error else None)
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM progress GROUP BY status"))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_checkpoint(output_path, jsonl=False, resume=False):
+    """Checkpoint stored next to the scraper's output file (the .jsonl one with
+    jsonl=True); a fresh run (resume=False) starts it empty.
+
+    Only JSONL output can be resumed: a JSON array is written when the run
+    ends, so after a crash its "done" URLs would have no records.
+    """
+    if resume and not jsonl:
+        raise ValueError("Only JSONL output can be resumed")
+    if jsonl:
+        output_path = jsonl_path(output_path)
+    checkpoint = Checkpoint(output_path + ".checkpoint.sqlite")
+    if not resume:
+        checkpoint.reset()
+    return checkpoint
@@ -0,0 +1,123 @@
+import argparse
+
+from common.hybrid import MODES
+from common.liveblog import add_follow_options
+from common.parsers import BACKENDS, default_backend, set_default_backend, set_targeted
+from common.readiness import db_path, set_adaptive, set_db_path
+
+
+class _ParserBackendAction(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        set_default_backend(values)
+        setattr(namespace, self.dest, values)
+
+
+class _FullParseAction(argparse.Action):
+    def __init__(self, option_strings, dest, **kwargs):
+        super().__init__(option_strings, dest, nargs=0, default=False, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        set_targeted(False)
+        setattr(namespace, self.dest, True)
+
+
+class _ResumeAction(argparse.Action):
+    # a JSON array is only written at the end of a run, so resuming needs the JSONL stream
+    def __init__(self, option_strings, dest, **kwargs):
+        super().__init__(option_strings, dest, nargs=0, default=False, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        namespace.jsonl = True
+        setattr(namespace, self.dest, True)
+
+
+class _LatencyDbAction(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        set_db_path(values)
+        setattr(namespace, self.dest, values)
+
+
+class _FixedWaitsAction(argparse.Action):
+    def __init__(self, option_strings, dest, **kwargs):
+        super().__init__(option_strings, dest, nargs=0, default=False, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        set_adaptive(False)
+        setattr(namespace, self.dest, True)
+
+
+def scraper_args(description=None):
+    """Argument parser with the options every URL-list scraper understands"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--jsonl", action="store_true",
+                        help="stream one JSON record per line to <output>.jsonl as articles finish")
+    parser.add_argument("--fsync-every", type=int, default=0, metavar="N",
+                        help="with --jsonl, fsync the output every N records (default: never)")
+    parser.add_argument("--resume", action=_ResumeAction,
+                        help="skip URLs a previous --jsonl run finished and keep its output, retrying failed ones "
+                             "(implies --jsonl)")
+    parser.add_argument("--http-cache", metavar="DIR",
+                        help="keep fetched pages in DIR and revalidate them (ETag/Last-Modified) on later runs")
+    parser.add_argument("--parser", choices=BACKENDS, default=default_backend(), action=_ParserBackendAction,
+                        help="HTML parser backend used for extraction (default: %(default)s, or $SCRAPER_PARSER)")
+    parser.add_argument("--full-parse", action=_FullParseAction,
+                        help="build the whole DOM even where a scraper only needs a few elements")
+    return parser
+
+
+def archive_args(parser):
+    """Add the raw HTML archive options used by the browser scrapers"""
+    parser.add_argument("--archive", default="html_archive", metavar="DIR",
+                        help="keep a compressed copy of every fetched page in DIR (default: %(default)s)")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="don't archive fetched pages")
+    parser.add_argument("--replay", metavar="DIR",
+                        help="re-run extraction over the latest archived HTML in DIR instead of fetching")
+    return parser
+
+
+def readiness_args(parser):
+    """Add the page readiness options used by the browser scrapers"""
+    parser.add_argument("--latency-db", default=db_path(), action=_LatencyDbAction, metavar="PATH",
+                        help="where per-domain page latencies are learned (default: %(default)s, or $SCRAPER_LATENCY_DB)")
+    parser.add_argument("--fixed-waits", action=_FixedWaitsAction,
+                        help="always allow each site's full timeout instead of learned deadlines")
+    return parser
+
+
+def fetch_args(parser):
+    """Add the option choosing between plain HTTP, the browser, or HTTP with browser fallback"""
+    parser.add_argument("--fetch", choices=MODES, default="hybrid",
+                        help="hybrid: plain HTTP first, the browser only for pages that need it; "
+                             "browser: always render; http: never start a browser (default: %(default)s)")
+    return parser
+
+
+def embedded_args(parser):
+    """Add the option to read articles from the JSON state embedded in the page"""
+    parser.add_argument("--embedded-json", action="store_true",
+                        help="take article fields from the page's embedded JSON state, using the DOM only for what it lacks")
+    return parser
+
+
+def follow_args(parser):
+    """Add the liveblog follower options"""
+    parser.add_argument("--follow", action="store_true",
+                        help="keep polling the liveblogs and append only new or edited entries to liveblog_updates.jsonl")
+    return add_follow_options(parser)
+
+
+def open_archive(args):
+    """The HtmlArchive pages should be written to, or None"""
+    if args.no_archive:
+        return None
+    from common.archive import HtmlArchive
+    return HtmlArchive(args.archive)
+
+
+def open_http_cache(args):
+    """The HttpCache asked for with --http-cache, or None"""
+    if not getattr(args, "http_cache", None):
+        return None
+    from common.httpcache import HttpCache
+    return HttpCache(args.http_cache)
@@ -0,0 +1,103 @@
+"""Decode the JSON state sites serialize into their pages.
+
+Arc-based sites (Reuters, the Washington Post) ship the whole article as a
+JSON document inside a <script>: Next.js pages in
+<script id="__NEXT_DATA__">, Fusion pages as a Fusion.globalContent=...
+assignment. Reading that is cheaper and steadier than walking the rendered
+markup. orjson is used when it is installed, the stdlib json otherwise.
+"""
+import json
+import re
+
+from common.parsers import parse_html
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_decoder = json.JSONDecoder()
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def script_json(html, script_id):
+    """JSON content of <script id=script_id>, or None if absent or invalid"""
+    match = re.search(
+        r"<script\b[^>]*\bid=[\"']?" + re.escape(script_id) + r"[\"']?[^>]*>(.*?)</script\s*>",
+        html, re.IGNORECASE | re.DOTALL,
+    )
+    if not match:
+        return None
+    try:
+        return loads(match.group(1))
+    except ValueError:
+        return None
+
+
+def assigned_json(html, name):
+    """The JSON value of a `name = {...};` assignment in an inline script, or None"""
+    match = re.search(re.escape(name) + r"\s*=\s*", html)
+    if not match:
+        return None
+    start = match.end()
+    # the value normally ends right before the next statement or </script>
+    end = re.compile(r";\s*(?:[\w.$]+\s*=|</script)|</script", re.IGNORECASE).search(html, start)
+    if end:
+        try:
+            return loads(html[start:end.start()])
+        except ValueError:
+            pass
+    # a ";x=" or "</script" inside a string cut it short: let the decoder find the end
+    try:
+        return _decoder.raw_decode(html, start)[0]
+    except ValueError:
+        return None
+
+
+def dig(data, *path, default=None):
+    """data[path[0]][path[1]]..., or default as soon as a step is missing"""
+    for key in path:
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return default
+    return default if data is None else data
+
+
+def element_texts(content_elements, types=("text",)):
+    """Stripped text of each Arc content element of one of types, empty ones left out.
+
+    Element content is inline HTML; its text is taken the same way the DOM
+    extractors do (text(strip=True)) so both paths produce the same strings.
+    """
+    texts = []
+    for element in content_elements or []:
+        if not isinstance(element, dict) or element.get("type") not in types:
+            continue
+        content = element.get("content")
+        if not isinstance(content, str):
+            continue
+        text = parse_html(content).text(strip=True) if "<" in content or "&" in content else content.strip()
+        if text:
+            texts.append(text)
+    return texts
+
+
+def with_fallback(fields, fallback):
+    """fields with every None or "" value taken from fallback() instead.
+
+    fallback is only called when something is missing, so the DOM behind it
+    is never built for pages whose embedded state has everything.
+    """
+    if all(value is not None and value != "" for value in fields.values()):
+        return fields
+    fallback_fields = fallback()
+    if not fallback_fields:
+        return fields
+    return {key: value if value is not None and value != "" else fallback_fields.get(key, value)
+            for key, value in fields.items()}
@@ -0,0 +1,57 @@
+import asyncio
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import aiohttp
+
+
+async def _fetch_one(session, url, host_slots, limiter, cache):
+    """Fetch one URL while holding a slot for its host"""
+    async with host_slots[urlsplit(url).netloc]:
+        if limiter:
+            await limiter.wait_async(url)
+
+        entry = cache.lookup(url, session.headers) if cache else None
+        try:
+            async with session.get(url, headers=entry.conditional_headers() if entry else None) as response:
+                status = response.status
+                if status == 304 and entry:
+                    cache.refresh(entry, response.headers)
+                    status, text = 200, entry.text
+                else:
+                    body = await response.read()
+                    text = body.decode(response.get_encoding(), errors="replace")
+                    if status == 200 and cache:
+                        cache.store(url, session.headers, response.headers, body)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"❌ Request failed for {url}: {e!r}")
+            status, text = None, None
+
+    return status, text
+
+
+async def fetch_all_async(urls, handler, cookies=None, headers=None,
+                          per_host=2, limit=20, timeout=30, limiter=None, cache=None):
+    """Fetch every URL concurrently and pass each response to handler.
+
+    handler(url, status, text) is called as soon as each response arrives;
+    status and text are None when the request itself failed. limiter is an
+    optional DomainRateLimiter and cache an optional HttpCache to revalidate
+    against. Returns the handler results in the same order as urls.
+    """
+    host_slots = defaultdict(lambda: asyncio.Semaphore(per_host))
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=per_host)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async with aiohttp.ClientSession(headers=headers, cookies=cookies,
+                                     connector=connector, timeout=client_timeout) as session:
+        async def run(url):
+            status, text = await _fetch_one(session, url, host_slots, limiter, cache)
+            return handler(url, status, text)
+
+        return await asyncio.gather(*(run(url) for url in urls))
+
+
+def fetch_all(urls, handler, **kwargs):
+    """Blocking wrapper around fetch_all_async for the script entry points"""
+    return asyncio.run(fetch_all_async(urls, handler, **kwargs))
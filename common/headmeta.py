@@ -0,0 +1,89 @@
+"""Read page metadata straight out of <head> without building a DOM.
+
+Publication dates, titles and lead images usually sit in JSON-LD blocks and
+OpenGraph <meta> tags near the top of the page. scan_head() regex-scans the
+markup for those and stops at </head> (or the first <body>), so callers can
+fill those fields first and only query the DOM for what is missing.
+"""
+import html as htmllib
+import json
+import re
+
+# scripts and comments are matched whole, so a "</head>" inside one doesn't end the scan
+_TAG_RE = re.compile(
+    r"<script\b([^>]*)>(.*?)</script\s*>"
+    r"|<title\b[^>]*>(.*?)</title\s*>"
+    r"|<(meta|time)\b([^>]*)>"
+    r"|<!--.*?-->"
+    r"|(</head\s*>|<body[\s>])",
+    re.IGNORECASE | re.DOTALL,
+)
+_ATTR_RE = re.compile(r"""([^\s=/>"']+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>"']+)))?""")
+
+
+def _attrs(text):
+    attrs = {}
+    for name, double, single, bare in _ATTR_RE.findall(text):
+        name = name.lower()
+        if name not in attrs:
+            attrs[name] = htmllib.unescape(double or single or bare)
+    return attrs
+
+
+class HeadMeta:
+    """What scan_head() found: ld_json objects, <meta> content by property
+    and by name, the <title> text and the datetime of the first <time>."""
+
+    def __init__(self):
+        self.ld_json = []
+        self.properties = {}
+        self.names = {}
+        self.title = None
+        self.time_datetime = None
+
+    def get(self, key, default=None):
+        """Content of the first <meta property=key>, else of <meta name=key>"""
+        if key in self.properties:
+            return self.properties[key]
+        return self.names.get(key, default)
+
+    def ld_value(self, key):
+        """key from the first JSON-LD object (top-level or in a list) that has it"""
+        for data in self.ld_json:
+            entries = data if isinstance(data, list) else [data]
+            for entry in entries:
+                if isinstance(entry, dict) and key in entry:
+                    return entry[key]
+        return None
+
+
+def scan_head(html):
+    """Scan html (str or bytes) up to the end of <head> for metadata"""
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+
+    found = HeadMeta()
+    for match in _TAG_RE.finditer(html):
+        script_attrs, script_body, title, tag, tag_attrs, head_end = match.groups()
+        if head_end is not None:
+            break
+        if script_attrs is not None:
+            if _attrs(script_attrs).get("type", "").strip().lower() == "application/ld+json":
+                try:
+                    found.ld_json.append(json.loads(script_body))
+                except ValueError:
+                    continue
+        elif title is not None:
+            if found.title is None:
+                found.title = htmllib.unescape(title)
+        elif tag is not None:
+            attrs = _attrs(tag_attrs)
+            if tag.lower() == "meta":
+                if "content" in attrs:
+                    if attrs.get("property"):
+                        found.properties.setdefault(attrs["property"], attrs["content"])
+                    if attrs.get("name"):
+                        found.names.setdefault(attrs["name"], attrs["content"])
+            elif found.time_datetime is None and attrs.get("datetime"):
+                found.time_datetime = attrs["datetime"]
+    return found
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from requests.utils import get_encoding_from_headers
+
+# headers describing the stored body itself, which no longer apply once it is decoded
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def _charset(headers, default="utf-8"):
+    content_type = headers.get("Content-Type") or headers.get("content-type") or ""
+    for part in content_type.split(";")[1:]:
+        name, _, value = part.strip().partition("=")
+        if name.lower() == "charset" and value:
+            return value.strip('"')
+    return default
+
+
+class CachedResponse:
+    """A cache entry: decoded body plus the response headers it was stored with"""
+
+    def __init__(self, key, url, headers, body):
+        self.key = key
+        self.url = url
+        self.headers = headers
+        self.body = body
+
+    @property
+    def text(self):
+        return self.body.decode(_charset(self.headers), errors="replace")
+
+    def conditional_headers(self):
+        """If-None-Match / If-Modified-Since to revalidate this entry"""
+        conditional = {}
+        lowered = {k.lower(): v for k, v in self.headers.items()}
+        if lowered.get("etag"):
+            conditional["If-None-Match"] = lowered["etag"]
+        if lowered.get("last-modified"):
+            conditional["If-Modified-Since"] = lowered["last-modified"]
+        return conditional
+
+
+class HttpCache:
+    """On-disk cache of successful GET responses, revalidated with ETag/Last-Modified.
+
+    Entries are keyed by URL plus the request header values named in the
+    response's Vary header. Bodies live in files under directory, metadata in
+    an SQLite index, and the least recently used entries are evicted once the
+    bodies add up to more than max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=500 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "bodies"), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, url TEXT NOT NULL, headers TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_access REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access);"
+            "CREATE TABLE IF NOT EXISTS vary (url TEXT PRIMARY KEY, names TEXT NOT NULL);"
+        )
+        self.conn.commit()
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, "bodies", key[:2], key)
+
+    def _key(self, url, names, request_headers):
+        lowered = {k.lower(): v for k, v in (request_headers or {}).items()}
+        parts = [url] + [f"{name}={lowered.get(name, '')}" for name in names]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _vary_names(self, url):
+        row = self.conn.execute("SELECT names FROM vary WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def lookup(self, url, request_headers=None):
+        """The CachedResponse stored for this request, or None"""
+        with self._lock:
+            key = self._key(url, self._vary_names(url), request_headers)
+            row = self.conn.execute("SELECT headers FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._body_path(key), "rb") as f:
+                    body = f.read()
+            except FileNotFoundError:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+        return CachedResponse(key, url, json.loads(row[0]), body)
+
+    def store(self, url, request_headers, response_headers, body):
+        """Save a 200 response body; responses that vary on everything are skipped"""
+        vary = response_headers.get("Vary") or response_headers.get("vary") or ""
+        names = sorted({name.strip().lower() for name in vary.split(",") if name.strip()})
+        if "*" in names:
+            return
+        cache_control = response_headers.get("Cache-Control") or response_headers.get("cache-control") or ""
+        if "no-store" in cache_control.lower():
+            return
+
+        headers = {k: v for k, v in response_headers.items() if k.lower() not in _DROP_HEADERS}
+        with self._lock:
+            key = self._key(url, names, request_headers)
+            path = self._body_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(body)
+            self.conn.execute("INSERT OR REPLACE INTO vary (url, names) VALUES (?, ?)", (url, json.dumps(names)))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, url, headers, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, url, json.dumps(headers), len(body), time.time()),
+            )
+            self._evict()
+            self.conn.commit()
+
+    def refresh(self, entry, response_headers):
+        """Merge the headers of a 304 into a still valid entry"""
+        headers = dict(entry.headers)
+        headers.update({k: v for k, v in response_headers.items() if k.lower() not in _DROP_HEADERS})
+        entry.headers = headers
+        with self._lock:
+            self.conn.execute("UPDATE entries SET headers = ?, last_access = ? WHERE key = ?",
+                              (json.dumps(headers), time.time(), entry.key))
+            self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._body_path(key))
+            except FileNotFoundError:
+                pass
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def close(self):
+        self.conn.close()
+
+
+class CachingAdapter(HTTPAdapter):
+    """requests transport adapter that serves GETs through an HttpCache.
+
+    A cached URL is re-requested with If-None-Match/If-Modified-Since; a 304
+    is turned into a 200 carrying the cached body, so callers never see it.
+    Responses served this way have from_cache = True.
+    """
+
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method != "GET":
+            return super().send(request, stream=stream, **kwargs)
+
+        entry = self.cache.lookup(request.url, request.headers)
+        if entry:
+            request.headers.update(entry.conditional_headers())
+
+        response = super().send(request, stream=stream, **kwargs)
+        response.from_cache = False
+
+        if response.status_code == 304 and entry:
+            self.cache.refresh(entry, response.headers)
+            response.status_code = 200
+            response.reason = "OK (cached)"
+            response.headers.update(entry.headers)
+            response.headers.pop("Content-Encoding", None)
+            response._content = entry.body
+            response._content_consumed = True
+            response.encoding = get_encoding_from_headers(response.headers)
+            response.from_cache = True
+        elif response.status_code == 200 and not stream:
+            self.cache.store(request.url, request.headers, response.headers, response.content)
+        return response
@@ -0,0 +1,189 @@
+"""Fetch pages over plain HTTP first and render only the rest in a browser.
+
+Many pages the browser scrapers load are server-rendered: a GET with browser
+headers (and, where a site needs them, its cookies) already returns the
+article. http_first() fetches every URL that way, concurrently, and hands
+each page that shows one of the extractor's selectors to the scraper. Only
+the pages that fail that check, or that the scraper rejects, are returned
+for the browser.
+
+Each domain's outcomes are counted next to the page latencies of
+common.readiness (same SQLite file): pages served over HTTP, pages that had
+to be escalated, and pages sent straight to the browser. A domain where
+HTTP almost never works stops being tried first, apart from an occasional
+probe, so it doesn't pay for a useless request on every page. To see the
+counts:
+
+    python -m common.hybrid stats
+"""
+import argparse
+import os
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+from common.fetch import fetch_all
+from common.parsers import Targets, parse_html
+from common.readiness import db_path
+
+MODES = ("hybrid", "browser", "http")
+
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# a domain is sent straight to the browser once HTTP served less than
+# SKIP_BELOW of at least SKIP_AFTER tries
+SKIP_AFTER = 20
+SKIP_BELOW = 0.1
+PROBE_EVERY = 10
+
+
+def domain(url):
+    return urlsplit(url).netloc.lower()
+
+
+def has_selectors(html, selectors):
+    """Whether any of the CSS selectors matches in html"""
+    try:
+        only = Targets(*selectors)
+    except ValueError:
+        # not simple enough for a targeted parse, build the whole DOM
+        only = None
+    doc = parse_html(html, only=only)
+    return any(doc.select_one(selector) is not None for selector in selectors)
+
+
+class PathStats:
+    """Per-domain count of pages served over HTTP, escalated, or sent straight to the browser"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS fetch_paths ("
+            " domain TEXT PRIMARY KEY,"
+            " http INTEGER NOT NULL DEFAULT 0,"
+            " escalated INTEGER NOT NULL DEFAULT 0,"
+            " direct INTEGER NOT NULL DEFAULT 0,"
+            " updated_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def counts(self, host):
+        row = self.conn.execute(
+            "SELECT http, escalated, direct FROM fetch_paths WHERE domain = ?", (host,)
+        ).fetchone()
+        return row or (0, 0, 0)
+
+    def record(self, host, path):
+        if path not in ("http", "escalated", "direct"):
+            raise ValueError(f"Unknown fetch path {path!r}")
+        self.conn.execute(
+            f"INSERT INTO fetch_paths (domain, {path}, updated_at) VALUES (?, 1, ?)"
+            f" ON CONFLICT(domain) DO UPDATE SET {path} = {path} + 1, updated_at = excluded.updated_at",
+            (host, time.time()),
+        )
+        self.conn.commit()
+
+    def skip_http(self, host):
+        """Whether the next page of host should go straight to the browser"""
+        http, escalated, direct = self.counts(host)
+        tried = http + escalated
+        if tried < SKIP_AFTER or http / tried >= SKIP_BELOW:
+            return False
+        # every PROBE_EVERY-th page still tries HTTP, in case the site changed
+        return (tried + direct) % PROBE_EVERY != 0
+
+    def rows(self):
+        return self.conn.execute(
+            "SELECT domain, http, escalated, direct FROM fetch_paths ORDER BY domain"
+        ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+_stats = {}
+
+
+def shared_path_stats():
+    """The PathStats of this process for the current readiness db_path()"""
+    key = (os.getpid(), db_path())
+    stats = _stats.get(key)
+    if stats is None:
+        stats = _stats[key] = PathStats(key[1])
+    return stats
+
+
+def http_first(urls, selectors, on_page, mode="hybrid", stats=None, headers=None, **fetch_kwargs):
+    """Fetch urls over HTTP and pass each page showing one of selectors to on_page(url, html).
+
+    on_page can return False to reject a page (say, its extraction came
+    out empty); the URL is then escalated like a page that failed the
+    check. Returns the URLs still to do, in their original order: with
+    mode="hybrid" everything that needs a browser, with "browser" all of
+    urls, with "http" only those that could not be fetched (every fetched
+    page goes to on_page, checked or not). fetch_kwargs go to fetch_all
+    (cookies, per_host, limiter, cache...); headers default to
+    BROWSER_HEADERS.
+    """
+    if mode == "browser":
+        return list(urls)
+    stats = stats or shared_path_stats()
+
+    try_http = []
+    left = set()
+    for url in urls:
+        if mode == "hybrid" and stats.skip_http(domain(url)):
+            stats.record(domain(url), "direct")
+            left.add(url)
+        else:
+            try_http.append(url)
+
+    def handle(url, status, text):
+        host = domain(url)
+        if status != 200 or not text:
+            if mode == "hybrid":
+                stats.record(host, "escalated")
+            left.add(url)
+            return
+        passed = has_selectors(text, selectors)
+        if mode == "http" or passed:
+            accepted = on_page(url, text) is not False
+            passed = passed and accepted
+        if mode == "hybrid":
+            stats.record(host, "http" if passed else "escalated")
+            if not passed:
+                left.add(url)
+
+    if try_http:
+        fetch_all(try_http, handle, headers=headers or BROWSER_HEADERS, **fetch_kwargs)
+    return [url for url in urls if url in left]
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m common.hybrid",
+                                     description="Show which fetch path each domain has needed")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats_parser = commands.add_parser("stats", help="pages served over HTTP vs. by the browser, per domain")
+    stats_parser.add_argument("--db", default=db_path(), help="stats database (default: %(default)s)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist")
+    stats = PathStats(args.db)
+    print(f"{'domain':40} {'http':>6} {'escalated':>9} {'direct':>6} {'http %':>7}")
+    for host, http, escalated, direct in stats.rows():
+        total = http + escalated + direct
+        share = 100 * http / total if total else 0
+        print(f"{host:40} {http:>6} {escalated:>9} {direct:>6} {share:>6.1f}%")
+    stats.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,574 @@
+"""Single-pass parser for Times of Israel style liveblogs.
+
+A liveblog page is a long run of entries:
+
+    <div id="liveblog-entry-123">
+      <div class="liveblog-date">11:54 pm</div>
+      <div class="liveblog-paragraph">
+        <h4><a href="...">Headline</a></h4>
+        <div class="byline">By <a href="...">Author</a></div>
+        <div class="media"><img src="..."><div class="caption">...</div></div>
+        <p>...</p>
+        <ul class="social"><li><a class="facebook" href="...">...</a></li></ul>
+      </div>
+    </div>
+
+LiveblogParser reads the markup with the stdlib tokenizer and never builds a
+tree: each entry's fields are collected while it is open and the entry is
+handed out as soon as its closing tag is seen, in the order entries open
+(an entry nested in another comes out after it, as in a find_all()). The date of a
+liveblog-paragraph is the last liveblog-date sibling closed before it, which
+is what find_previous_sibling() gave, without walking back for every entry.
+Text follows BeautifulSoup's get_text(): entities decoded, comments and
+script/style/template contents left out.
+
+    python -m common.liveblog bench 06-05-2025/liveblog_april_28_2025.json --copies 50
+
+rebuilds a page from a saved blog.py output and times this parser against
+the old BeautifulSoup walk on it.
+
+    python -m common.liveblog follow https://www.timesofisrael.com/liveblog-april-28-2025/ --interval 60
+
+polls liveblogs and appends only new or edited entries to a JSONL stream.
+Pages list the newest entry first, so each poll streams the response through
+the parser and hangs up after a few entries in a row it has already seen:
+the work per poll follows the amount of new content, not the page size.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from html import escape
+from html.parser import HTMLParser
+
+# tags HTMLParser never sends an end tag for
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+              "meta", "param", "source", "track", "wbr"}
+_NON_TEXT_TAGS = {"script", "style", "template"}
+
+
+def text(strings, strip=False):
+    """Join collected strings like get_text() / get_text(strip=True)"""
+    if strings is None:
+        return None
+    if strip:
+        return "".join(s.strip() for s in strings if s.strip())
+    return "".join(strings)
+
+
+class LiveblogEntry:
+    """Fields of one entry. Text fields hold the raw strings found in the
+    element (render them with text()), or None when the element is absent."""
+
+    def __init__(self, entry_id=None, previous_date=None):
+        self.id = entry_id
+        self.previous_date = previous_date
+        self.date = None
+        self.heading = None
+        self.heading_link = None
+        self.author = None
+        self.author_link = None
+        self.image_url = None
+        self.caption = None
+        self.paragraphs = []
+        self.social_links = None
+
+
+class _Frame:
+    __slots__ = ("tag", "attrs", "classes", "captures", "entry", "role", "owners", "last_date")
+
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = attrs
+        self.classes = (attrs.get("class") or "").split()
+        self.captures = []
+        self.entry = None
+        self.role = None
+        # {entry: role} for the heading/byline/media/social element of an entry
+        self.owners = {}
+        self.last_date = None
+
+
+class LiveblogParser(HTMLParser):
+    """Feed page markup in as many chunks as convenient; every call to
+    parse() yields the entries completed by that chunk.
+
+    unit="entry" makes one record per <div id="liveblog-entry-...">,
+    unit="paragraph" one per <div class="liveblog-paragraph">. The page's
+    h1.headline text ends up in title.
+    """
+
+    def __init__(self, unit="entry"):
+        super().__init__(convert_charrefs=True)
+        self.unit = unit
+        self.title = None
+        self._stack = [_Frame(None, {})]
+        self._scopes = []
+        # [entry, closed] in the order entries opened, until every earlier one is closed too
+        self._pending = []
+        self._done = []
+        self._skip = 0
+
+    def entries(self, html):
+        """All entries of html, a string or an iterable of chunks, ending the input"""
+        for chunk in ([html] if isinstance(html, str) else html):
+            yield from self.parse(chunk)
+        yield from self.finish()
+
+    def parse(self, chunk):
+        self.feed(chunk)
+        done, self._done = self._done, []
+        yield from done
+
+    def finish(self):
+        """Flush the tokenizer; yields entries left open at end of input"""
+        self.close()
+        while len(self._stack) > 1:
+            self._pop()
+        done, self._done = self._done, []
+        yield from done
+
+    # -- tokenizer callbacks --
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value if value is not None else "" for name, value in attrs}
+        if tag in _VOID_TAGS:
+            self._element(tag, attrs, None)
+            return
+        frame = _Frame(tag, attrs)
+        self._stack.append(frame)
+        self._element(tag, attrs, frame)
+        if tag in _NON_TEXT_TAGS:
+            self._skip += 1
+
+    def handle_startendtag(self, tag, attrs):
+        attrs = {name: value if value is not None else "" for name, value in attrs}
+        self._element(tag, attrs, None)
+
+    def handle_endtag(self, tag):
+        if not any(frame.tag == tag for frame in self._stack[1:]):
+            return
+        while True:
+            frame = self._pop()
+            if frame.tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        for frame in self._stack:
+            for strings in frame.captures:
+                strings.append(data)
+
+    # -- bookkeeping --
+
+    def _capture(self, frame):
+        strings = []
+        if frame is not None:
+            frame.captures.append(strings)
+        return strings
+
+    def _element(self, tag, attrs, frame):
+        parent = self._stack[-2] if frame is not None else self._stack[-1]
+        classes = (attrs.get("class") or "").split()
+
+        if tag == "h1" and "headline" in classes and self.title is None and frame is not None:
+            frame.role = "title"
+            self.title = self._capture(frame)
+
+        if frame is not None and tag == "div":
+            starts_entry = (attrs.get("id", "").startswith("liveblog-entry") if self.unit == "entry"
+                            else "liveblog-paragraph" in classes)
+            if starts_entry:
+                frame.entry = LiveblogEntry(attrs.get("id"), text(parent.last_date, strip=True)
+                                            if parent.last_date is not None else None)
+                self._scopes.append(frame)
+                self._pending.append([frame.entry, False])
+            if "liveblog-date" in classes:
+                frame.role = "date"
+                frame.last_date = self._capture(frame)
+
+        for scope in self._scopes:
+            if scope is frame:
+                continue
+            self._scope_element(scope.entry, tag, attrs, classes, frame)
+
+    def _scope_element(self, entry, tag, attrs, classes, frame):
+        # first match wins, like find() on the entry
+        # only the entry's own blocks count: an entry nested in another's
+        # social list or heading is not inside a block of its own
+        inside = {f.owners[entry] for f in self._stack if entry in f.owners}
+        if tag == "div" and "liveblog-date" in classes and entry.date is None and frame is not None:
+            entry.date = frame.last_date
+        elif tag == "h4" and entry.heading is None and frame is not None:
+            frame.owners[entry] = "heading"
+            entry.heading = self._capture(frame)
+        elif tag == "div" and "byline" in classes and entry.author is None and frame is not None:
+            frame.owners[entry] = "byline"
+            entry.author = self._capture(frame)
+        elif tag == "div" and "media" in classes and entry.image_url is None and frame is not None:
+            frame.owners[entry] = "media"
+            entry.image_url = ""
+        elif tag == "ul" and "social" in classes and entry.social_links is None and frame is not None:
+            frame.owners[entry] = "social"
+            entry.social_links = {}
+
+        if tag == "a" and "heading" in inside and entry.heading_link is None:
+            entry.heading_link = attrs.get("href")
+        if tag == "a" and "byline" in inside and entry.author_link is None:
+            entry.author_link = attrs.get("href")
+        if "media" in inside:
+            if tag == "img" and entry.image_url == "":
+                entry.image_url = attrs.get("src")
+            elif tag == "div" and "caption" in classes and entry.caption is None and frame is not None:
+                entry.caption = self._capture(frame)
+        if tag == "a" and "social" in inside and "href" in attrs:
+            entry.social_links[classes[0] if classes else "unknown"] = attrs["href"]
+        if tag == "p" and frame is not None:
+            entry.paragraphs.append(self._capture(frame))
+
+    def _pop(self):
+        frame = self._stack.pop()
+        if frame.tag in _NON_TEXT_TAGS:
+            self._skip -= 1
+        if frame.role == "date" and frame.last_date is not None:
+            self._stack[-1].last_date = frame.last_date
+        if frame.entry is not None:
+            self._scopes.remove(frame)
+            entry = frame.entry
+            if entry.image_url == "":
+                # media block without an image
+                entry.image_url = None
+            for pending in self._pending:
+                if pending[0] is entry:
+                    pending[1] = True
+                    break
+            closed = 0
+            while closed < len(self._pending) and self._pending[closed][1]:
+                self._done.append(self._pending[closed][0])
+                closed += 1
+            del self._pending[:closed]
+        return frame
+
+
+def iter_entries(html, unit="entry"):
+    """Entries of a liveblog page, html being a string or an iterable of chunks"""
+    return LiveblogParser(unit=unit).entries(html)
+
+
+def entry_record(entry):
+    """The liveblog entry record fix/timesofisrael.py writes"""
+    return {
+        "heading": text(entry.heading),
+        "heading_link": entry.heading_link,
+        "date": text(entry.date),
+        "author": text(entry.author),
+        "author_link": entry.author_link,
+        "image_url": entry.image_url,
+        "caption": text(entry.caption),
+        "content": " ".join([text(para) for para in entry.paragraphs]) if entry.paragraphs else None,
+        "social_links": entry.social_links or {}
+    }
+
+
+def blog_record(entry):
+    """The {time, headline, content, author} record 06-05-2025/blog.py writes"""
+    content = " ".join(text(p, strip=True) for p in entry.paragraphs)
+    time_text = entry.previous_date
+    if time_text is None and entry.date is not None:
+        # unit="entry" records hold their date instead of following it
+        time_text = text(entry.date, strip=True)
+    return {
+        "time": time_text or "No time",
+        "headline": text(entry.heading, strip=True) if entry.heading is not None else "No headline",
+        "content": content if content else "No content",
+        "author": text(entry.author, strip=True).replace("By", "") if entry.author is not None else "Unknown",
+    }
+
+
+# liveblog pages turn away the default python-requests agent
+FOLLOW_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+}
+
+
+def entry_digest(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class LiveblogState:
+    """Entries already emitted for each followed URL (id and content digest),
+    plus the ETag/Last-Modified of the last page fetched, in SQLite."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " url TEXT NOT NULL, entry_id TEXT NOT NULL, digest TEXT NOT NULL,"
+            " first_seen TEXT NOT NULL, updated_at TEXT NOT NULL,"
+            " PRIMARY KEY (url, entry_id));"
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, polled_at TEXT NOT NULL);"
+        )
+        self.conn.commit()
+
+    def digest(self, url, entry_id):
+        row = self.conn.execute("SELECT digest FROM entries WHERE url = ? AND entry_id = ?",
+                                (url, entry_id)).fetchone()
+        return row[0] if row else None
+
+    def remember(self, url, entry_id, digest):
+        now = datetime.now().isoformat(timespec="seconds")
+        self.conn.execute(
+            "INSERT INTO entries (url, entry_id, digest, first_seen, updated_at) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT(url, entry_id) DO UPDATE SET digest = excluded.digest, updated_at = excluded.updated_at",
+            (url, entry_id, digest, now, now),
+        )
+        self.conn.commit()
+
+    def conditional_headers(self, url):
+        row = self.conn.execute("SELECT etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def polled(self, url, response_headers):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (url, etag, last_modified, polled_at) VALUES (?, ?, ?, ?)",
+            (url, response_headers.get("ETag"), response_headers.get("Last-Modified"),
+             datetime.now().isoformat(timespec="seconds")),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def poll(session, url, state, record=entry_record, known_run=3, chunk_size=16384):
+    """Fetch url once and return [(event, entry_id, record)] for entries that
+    are "new" or "edited" since the last poll, oldest first.
+
+    Reading stops after known_run consecutive entries that are already known
+    and unchanged; edits further down than that are not noticed.
+    """
+    response = session.get(url, headers=state.conditional_headers(url), stream=True, timeout=30)
+    with response:
+        if response.status_code == 304:
+            return []
+        response.raise_for_status()
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            # requests would assume ISO-8859-1 for text/html without a charset
+            response.encoding = "utf-8"
+
+        changes = []
+        known = 0
+        chunks = response.iter_content(chunk_size=chunk_size, decode_unicode=True)
+        for entry in LiveblogParser(unit="entry").entries(chunks):
+            fields = record(entry)
+            digest = entry_digest(fields)
+            previous = state.digest(url, entry.id)
+            if previous == digest:
+                known += 1
+                if known >= known_run:
+                    break
+                continue
+            known = 0
+            changes.append(("new" if previous is None else "edited", entry.id, fields, digest))
+        state.polled(url, response.headers)
+
+    changes.reverse()
+    return changes
+
+
+def state_path(output_path):
+    return os.path.splitext(output_path)[0] + ".state.sqlite"
+
+
+def add_follow_options(parser):
+    parser.add_argument("--interval", type=float, default=60, metavar="SECONDS",
+                        help="time between polls of each liveblog (default: %(default)s)")
+    parser.add_argument("--known-run", type=int, default=3, metavar="N",
+                        help="stop reading a page after N already-seen entries in a row (default: %(default)s)")
+    parser.add_argument("--max-polls", type=int, metavar="N", help="stop after N polls (default: run until interrupted)")
+    return parser
+
+
+def follow(urls, output_path, state_path, record=entry_record, interval=60, known_run=3,
+           max_polls=None, session=None):
+    """Poll urls every interval seconds, appending one line per new or edited
+    entry to output_path, until interrupted or after max_polls rounds."""
+    from common.output import JsonlWriter
+    from common.sessions import get_session
+
+    session = session or get_session("liveblog", headers=FOLLOW_HEADERS)
+    polls = 0
+    with LiveblogState(state_path) as state, JsonlWriter(output_path, append=True) as output:
+        try:
+            while max_polls is None or polls < max_polls:
+                started = time.monotonic()
+                for url in urls:
+                    try:
+                        changes = poll(session, url, state, record=record, known_run=known_run)
+                    except Exception as e:
+                        print(f"❌ Poll failed for {url}: {e}")
+                        continue
+                    seen_at = datetime.now().isoformat(timespec="seconds")
+                    for event, entry_id, fields, digest in changes:
+                        # written before it is remembered: a crash repeats an entry instead of losing it
+                        output.write({"url": url, "entry_id": entry_id, "event": event, "seen_at": seen_at, **fields})
+                        state.remember(url, entry_id, digest)
+                    print(f"{seen_at} {url}: {len(changes)} new or edited entries")
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            print("Stopped following")
+    return output.count
+
+
+def _split_paragraphs(content, parts=3):
+    """<p> elements whose stripped texts joined with " " give content back"""
+    # paragraphs are joined with " ", so a trailing space was an empty <p>
+    body = content.rstrip(" ")
+    words = body.split(" ")
+    # only cut between two words whose edges strip() would not touch
+    cuts = [i for i in range(1, len(words)) if words[i - 1][-1:].strip() and words[i][:1].strip()]
+    cuts = sorted({cuts[len(cuts) * k // parts] for k in range(1, parts)}) if len(cuts) >= parts else []
+    pieces = [" ".join(words[start:stop]) for start, stop in zip([0] + cuts, cuts + [len(words)])]
+    return "".join(f"<p>{escape(piece)}</p>" for piece in pieces) + "<p></p>" * (len(content) - len(body))
+
+
+def _page_from_records(title, records, per_entry=3, nest_every=4):
+    """A liveblog page carrying records, and the records blog.py would read from it.
+
+    Every entry holds up to per_entry liveblog-paragraphs after its one
+    liveblog-date (so each takes that date as its time), each split into
+    several <p>; every nest_every-th entry sits inside the one before it.
+    """
+    groups = [records[i:i + per_entry] for i in range(0, len(records), per_entry)]
+    parts = [f'<html><head><title>{escape(title)}</title></head><body>',
+             f'<h1 class="headline">{escape(title)}</h1><div class="liveblog">']
+    expected = []
+    open_entries = 0
+    for number, group in enumerate(groups):
+        nested = nest_every and number % nest_every == nest_every - 1 and open_entries
+        if not nested:
+            parts.append("</div>" * open_entries)
+            open_entries = 0
+        time_text = group[0]["time"]
+        parts.append(f'<div id="liveblog-entry-{number}" class="liveblog-entry">'
+                     f'<div class="liveblog-date"><a href="#e{number}">{escape(time_text)}</a></div>')
+        for record in group:
+            parts.append(
+                f'<div class="liveblog-paragraph"><h4><a href="/e/{number}">{escape(record["headline"])}</a></h4>'
+                f'<div class="byline">By <a href="/writers/{number}">{escape(record["author"])}</a></div>'
+                f'<!-- entry body -->{_split_paragraphs(record["content"])}'
+                f'<ul class="social"><li><a class="facebook" href="https://fb/{number}">f</a></li></ul>'
+                f'</div>'
+            )
+            expected.append(dict(record, time=time_text))
+        open_entries += 1
+    parts.append("</div>" * open_entries)
+    parts.append("</div></body></html>")
+    return "".join(parts), expected
+
+
+def _soup_records(html):
+    # the per-paragraph BeautifulSoup walk blog.py used before this parser
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    records = []
+    for div in soup.find_all("div", class_="liveblog-paragraph"):
+        time_tag = div.find_previous_sibling("div", class_="liveblog-date")
+        headline_tag = div.find("h4")
+        content = " ".join(p.get_text(strip=True) for p in div.find_all("p"))
+        byline = div.find("div", class_="byline")
+        records.append({
+            "time": time_tag.get_text(strip=True) if time_tag else "No time",
+            "headline": headline_tag.get_text(strip=True) if headline_tag else "No headline",
+            "content": content if content else "No content",
+            "author": byline.get_text(strip=True).replace("By", "") if byline else "Unknown",
+        })
+    return records
+
+
+def _soup_entry_ids(html):
+    # the order TOI's old find_all('div', id=...) walk listed entries in
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    return [div["id"] for div in soup.select('div[id^="liveblog-entry"]')]
+
+
+def _bench(reference, copies, html_path=None, per_entry=3, nest_every=4):
+    with open(reference, "r", encoding="utf-8") as f:
+        saved = json.load(f)
+    if html_path:
+        with open(html_path, "r", encoding="utf-8") as f:
+            html = f.read()
+        expected = saved["entries"]
+    else:
+        # no raw page is kept, so rebuild one carrying the same entries
+        html, expected = _page_from_records(saved["title"], saved["entries"] * copies, per_entry, nest_every)
+
+    started = time.perf_counter()
+    streamed = [blog_record(entry) for entry in iter_entries(html, unit="paragraph")]
+    stream_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    walked = _soup_records(html)
+    soup_s = time.perf_counter() - started
+
+    entry_order = [entry.id for entry in iter_entries(html, unit="entry")] == _soup_entry_ids(html)
+
+    print(f"{len(expected)} paragraphs, {len(html) / 1024:.0f} KB")
+    print(f"single pass:        {stream_s * 1000:.1f} ms, {'matches' if streamed == expected else 'DIFFERS from'} {reference}")
+    print(f"soup + prev sibling: {soup_s * 1000:.1f} ms, {'matches' if walked == expected else 'DIFFERS from'} {reference}")
+    print(f"entries in document order: {'yes' if entry_order else 'NO'}")
+    return streamed == expected and entry_order
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Liveblog parser tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_cmd = sub.add_parser("bench", help="time the single-pass parser against the BeautifulSoup walk")
+    bench_cmd.add_argument("reference", help="a blog.py output, e.g. liveblog_april_28_2025.json")
+    bench_cmd.add_argument("--copies", type=int, default=1,
+                           help="repeat the saved entries this many times in the rebuilt page")
+    bench_cmd.add_argument("--html", help="parse this saved page instead of rebuilding one")
+    bench_cmd.add_argument("--per-entry", type=int, default=3,
+                           help="liveblog-paragraphs sharing each rebuilt entry's date (default: %(default)s)")
+    bench_cmd.add_argument("--nest-every", type=int, default=4,
+                           help="nest every Nth rebuilt entry in the one before it, 0 for none (default: %(default)s)")
+    follow_cmd = sub.add_parser("follow", help="append new and edited entries of liveblogs to a JSONL stream")
+    follow_cmd.add_argument("urls", nargs="+")
+    follow_cmd.add_argument("--output", default="liveblog_updates.jsonl")
+    follow_cmd.add_argument("--format", choices=("entry", "blog"), default="entry",
+                            help="record layout: timesofisrael.py liveblog entries or blog.py entries")
+    add_follow_options(follow_cmd)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        sys.exit(0 if _bench(args.reference, args.copies, args.html, args.per_entry, args.nest_every) else 1)
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    follow(args.urls, args.output, state_path(args.output),
+           record=blog_record if args.format == "blog" else entry_record,
+           interval=args.interval, known_run=args.known_run, max_polls=args.max_polls)
@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+
+
+def jsonl_path(path):
+    """articles.json -> articles.jsonl"""
+    root, ext = os.path.splitext(path)
+    return root + ".jsonl" if ext == ".json" else path + ".jsonl"
+
+
+class JsonArrayWriter:
+    """Collects records and writes them as one pretty-printed JSON array on close.
+
+    If order (a list of URLs) is given, records are written sorted by the
+    position of their "url" in it, so concurrent scrapers still produce the
+    input order. A new record replaces any earlier one with the same "url".
+    Nothing reaches the disk before close(), which is why a run can only be
+    resumed from JSONL output.
+    """
+
+    def __init__(self, path, indent=2, order=None):
+        self.path = path
+        self.indent = indent
+        self.order = order
+        self.records = []
+        self._by_url = {}
+
+    @property
+    def count(self):
+        return len(self.records)
+
+    def write(self, record):
+        i = self._by_url.get(record.get("url"))
+        if i is None:
+            if record.get("url"):
+                self._by_url[record["url"]] = len(self.records)
+            self.records.append(record)
+        else:
+            self.records[i] = record
+
+    def close(self):
+        if self.order is not None:
+            position = {url: i for i, url in enumerate(self.order)}
+            self.records.sort(key=lambda record: position.get(record.get("url"), len(position)))
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.records, f, ensure_ascii=False, indent=self.indent)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonlWriter:
+    """Appends one compact JSON record per line as soon as it is written.
+
+    Every line is flushed to the OS straight away; fsync_every > 0 also
+    forces it to disk every that many records. write() returns the byte
+    offset the record starts at. append=True continues an existing file,
+    dropping a half-written last line left by a crash.
+    """
+
+    def __init__(self, path, fsync_every=0, append=False):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.count = 0
+        if append and os.path.exists(path):
+            _drop_partial_line(path)
+        self._file = open(path, "ab" if append else "wb")
+        self._unsynced = 0
+
+    def write(self, record):
+        offset = self._file.tell()
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        self._file.write(line.encode("utf-8"))
+        self._file.flush()
+        self.count += 1
+
+        self._unsynced += 1
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        return offset
+
+    def close(self):
+        if self.fsync_every and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _drop_partial_line(path, chunk_size=65536):
+    with open(path, "r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - chunk_size)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                keep = start + newline + 1
+                break
+            pos = start
+        else:
+            keep = 0
+        if keep != end:
+            f.truncate(keep)
+
+
+def open_output(path, jsonl=False, indent=2, fsync_every=0, order=None, resume=False):
+    """The writer a scraper should use for path: JSONL stream or the usual JSON array.
+
+    JSONL records are written in completion order; order only applies to the
+    JSON array (see JsonArrayWriter). resume=True keeps what a previous run
+    already wrote, and needs jsonl=True.
+    """
+    if jsonl:
+        return JsonlWriter(jsonl_path(path), fsync_every=fsync_every, append=resume)
+    if resume:
+        raise ValueError("Only JSONL output can be resumed")
+    return JsonArrayWriter(path, indent=indent, order=order)
+
+
+def iter_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def jsonl_to_json(src, dst, indent=2):
+    """Rewrite a JSONL file as the pretty-printed array json.dump would produce,
+    one record at a time so memory stays flat.
+
+    A URL retried by --resume runs has a record per attempt; only its last
+    one is kept.
+    """
+    last = {}
+    for i, record in enumerate(iter_jsonl(src)):
+        if record.get("url"):
+            last[record["url"]] = i
+
+    pad = " " * indent
+    with open(dst, "w", encoding="utf-8") as out:
+        first = True
+        for i, record in enumerate(iter_jsonl(src)):
+            if record.get("url") and last[record["url"]] != i:
+                continue
+            text = json.dumps(record, ensure_ascii=False, indent=indent)
+            out.write("[\n" if first else ",\n")
+            out.write("\n".join(pad + line for line in text.split("\n")))
+            first = False
+        out.write("[]" if first else "\n]")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a scraper's JSONL output to a JSON array")
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    parser.add_argument("--indent", type=int, default=2)
+    args = parser.parse_args()
+    jsonl_to_json(args.src, args.dst, indent=args.indent)
+    print(f"Wrote {args.dst}")
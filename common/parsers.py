@@ -0,0 +1,409 @@
+"""One small selector API over several HTML parser backends.
+
+Extractors call parse_html() and only use the Node methods below, so the
+same extraction code runs on BeautifulSoup's html.parser (the old default),
+BeautifulSoup on lxml, or selectolax's lexbor engine, which parses large
+pages several times faster. Pick one with --parser or SCRAPER_PARSER.
+
+    python -m common.parsers parity html_archive POLITICO/politico_scraper.py:parse_politico_html
+
+re-runs an extractor over archived pages with every backend and reports any
+field that comes out different.
+
+Scrapers that only read a handful of elements can pass only=<targets> to
+parse_html(): with the BeautifulSoup backends everything outside those
+elements is dropped while the page is tokenized, so the tree (and its memory)
+is a fraction of the page. Targets are simple selectors, tag.class[attr="v"],
+naming the outermost element each of the scraper's CSS queries needs.
+
+    python -m common.parsers bench html_archive WSJ/wsj_scrapper.py:PARSE_TARGETS
+
+prints per-page parse time and peak memory for a full and a targeted parse.
+"""
+import argparse
+import importlib.util
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+BACKENDS = ("html.parser", "lxml", "lexbor")
+
+# bs4 leaves the contents of these out of get_text(), lexbor does not
+_NON_TEXT_TAGS = {"script", "style", "template"}
+
+_default_backend = os.environ.get("SCRAPER_PARSER", "html.parser")
+_targeted = not os.environ.get("SCRAPER_FULL_PARSE")
+
+_TARGET_RE = re.compile(r"^([\w-]*)((?:\.[\w-]+)*)((?:\[[\w-]+(?:[*^]?=\"[^\"]*\")?\])*)$")
+_TARGET_ATTR_RE = re.compile(r"\[([\w-]+)(?:([*^]?=)\"([^\"]*)\")?\]")
+
+
+def set_default_backend(backend):
+    global _default_backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown parser backend {backend!r}, expected one of {BACKENDS}")
+    _default_backend = backend
+
+
+def default_backend():
+    return _default_backend
+
+
+def set_targeted(enabled):
+    """Turn the only= targeted parse on or off for every later parse_html()"""
+    global _targeted
+    _targeted = enabled
+
+
+class Targets:
+    """Elements a targeted parse keeps, each given as tag.class[attr="value"].
+
+    Tag, classes and attribute tests are all optional; attributes can be
+    tested for presence, equality (=), substring (*=) or prefix (^=). A kept
+    element keeps its whole subtree.
+    """
+
+    def __init__(self, *selectors):
+        self.selectors = selectors
+        self._rules = [self._compile(selector) for selector in selectors]
+
+    @staticmethod
+    def _compile(selector):
+        match = _TARGET_RE.match(selector.strip())
+        if not match:
+            raise ValueError(f"Unsupported target selector {selector!r}")
+        tag, classes, attrs = match.groups()
+        classes = set(classes.split(".")[1:])
+        tests = _TARGET_ATTR_RE.findall(attrs)
+        return tag.lower(), classes, tests
+
+    def matches(self, name, attrs):
+        for tag, classes, tests in self._rules:
+            if tag and tag != name:
+                continue
+            if classes:
+                value = attrs.get("class") or ""
+                present = set(value.split() if isinstance(value, str) else value)
+                if not classes <= present:
+                    continue
+            if all(self._test(attrs, *test) for test in tests):
+                return True
+        return False
+
+    @staticmethod
+    def _test(attrs, name, op, expected):
+        if name not in attrs:
+            return False
+        if not op:
+            return True
+        value = attrs[name]
+        value = " ".join(value) if isinstance(value, list) else (value or "")
+        if op == "*=":
+            return expected in value
+        if op == "^=":
+            return value.startswith(expected)
+        return value == expected
+
+
+def _strainer(targets):
+    """A bs4 parse_only filter keeping only targets, or None if bs4 can't do it"""
+    try:
+        from bs4.filter import ElementFilter
+    except ImportError:
+        # bs4 before 4.13 has no tag-creation hook, parse the whole page
+        return None
+
+    class TargetFilter(ElementFilter):
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            return targets.matches(name, attrs or {})
+
+        def allow_string_creation(self, string):
+            return False
+
+    return TargetFilter()
+
+
+class SoupNode:
+    """Node API on top of a BeautifulSoup Tag"""
+
+    def __init__(self, tag):
+        self._tag = tag
+
+    @property
+    def tag(self):
+        return self._tag.name
+
+    @property
+    def attrs(self):
+        return {k: " ".join(v) if isinstance(v, list) else v for k, v in self._tag.attrs.items()}
+
+    @property
+    def classes(self):
+        return list(self._tag.get("class") or [])
+
+    def has_class(self, name):
+        return name in self.classes
+
+    def get(self, name, default=None):
+        value = self._tag.get(name, default)
+        return " ".join(value) if isinstance(value, list) else value
+
+    def has_attr(self, name):
+        return self._tag.has_attr(name)
+
+    def select_one(self, css):
+        found = self._tag.select_one(css)
+        return SoupNode(found) if found is not None else None
+
+    def select(self, css):
+        return [SoupNode(found) for found in self._tag.select(css)]
+
+    def text(self, strip=False, separator=""):
+        return self._tag.get_text(separator=separator, strip=strip)
+
+    @property
+    def parent(self):
+        parent = self._tag.parent
+        return SoupNode(parent) if parent is not None else None
+
+    def children(self):
+        return [SoupNode(child) for child in self._tag.find_all(True, recursive=False)]
+
+    def previous_siblings(self):
+        """Element siblings before this one, nearest first"""
+        return (SoupNode(sibling) for sibling in self._tag.find_previous_siblings(True))
+
+    def descendants(self):
+        """Every element below this one, in document order"""
+        return (SoupNode(child) for child in self._tag.find_all(True))
+
+    def remove(self):
+        self._tag.decompose()
+
+    def __eq__(self, other):
+        return isinstance(other, SoupNode) and self._tag is other._tag
+
+    def __hash__(self):
+        return id(self._tag)
+
+
+class LexborNode:
+    """Node API on top of a selectolax LexborNode"""
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def tag(self):
+        return self._node.tag
+
+    @property
+    def attrs(self):
+        return {k: (v if v is not None else "") for k, v in self._node.attributes.items()}
+
+    @property
+    def classes(self):
+        return (self._node.attributes.get("class") or "").split()
+
+    def has_class(self, name):
+        return name in self.classes
+
+    def get(self, name, default=None):
+        attributes = self._node.attributes
+        if name not in attributes:
+            return default
+        value = attributes[name]
+        return value if value is not None else ""
+
+    def has_attr(self, name):
+        return name in self._node.attributes
+
+    def select_one(self, css):
+        found = self._node.css_first(css)
+        return LexborNode(found) if found is not None else None
+
+    def select(self, css):
+        return [LexborNode(found) for found in self._node.css(css)]
+
+    def text(self, strip=False, separator=""):
+        # same rules as bs4 get_text(): skip comments and script/style bodies
+        # (unless called on the script itself), strip and drop empty strings
+        root_is_text_tag = self._node.tag in _NON_TEXT_TAGS
+        strings = []
+        for node in self._node.traverse(include_text=True):
+            if node.tag != "-text":
+                continue
+            if not root_is_text_tag and node.parent is not None and node.parent.tag in _NON_TEXT_TAGS:
+                continue
+            value = node.text_content or ""
+            if strip:
+                value = value.strip()
+                if not value:
+                    continue
+            strings.append(value)
+        return separator.join(strings)
+
+    @property
+    def parent(self):
+        parent = self._node.parent
+        return LexborNode(parent) if parent is not None else None
+
+    def children(self):
+        return [LexborNode(child) for child in self._node.iter() if not child.tag.startswith("-")]
+
+    def previous_siblings(self):
+        """Element siblings before this one, nearest first"""
+        sibling = self._node.prev
+        while sibling is not None:
+            if not sibling.tag.startswith("-"):
+                yield LexborNode(sibling)
+            sibling = sibling.prev
+
+    def descendants(self):
+        """Every element below this one, in document order"""
+        for node in self._node.traverse():
+            if node is not self._node and not node.tag.startswith("-"):
+                yield LexborNode(node)
+
+    def remove(self):
+        self._node.decompose()
+
+    def __eq__(self, other):
+        return isinstance(other, LexborNode) and self._node.mem_id == other._node.mem_id
+
+    def __hash__(self):
+        return self._node.mem_id
+
+
+def parse_html(html, backend=None, only=None):
+    """Parse html (str or bytes) and return the document as a Node.
+
+    only is a Targets; the BeautifulSoup backends then build just those
+    subtrees. Lexbor always builds the whole tree, which is already cheap.
+    """
+    backend = backend or _default_backend
+    if backend == "lexbor":
+        from selectolax.lexbor import LexborHTMLParser
+        tree = LexborHTMLParser(html)
+        return LexborNode(tree.root)
+    if backend in ("html.parser", "lxml"):
+        from bs4 import BeautifulSoup
+        strainer = _strainer(only) if only is not None and _targeted else None
+        return SoupNode(BeautifulSoup(html, backend, parse_only=strainer))
+    raise ValueError(f"Unknown parser backend {backend!r}, expected one of {BACKENDS}")
+
+
+def _load_attribute(spec):
+    path, _, name = spec.rpartition(":")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    module_spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(module)
+    return getattr(module, name)
+
+
+def parity(archive_dir, extractor, backends=BACKENDS):
+    """Run extractor(html=..., url=...) over every archived page with each backend.
+
+    Returns (pages checked, list of (url, field, {backend: value}) mismatches).
+    """
+    from common.archive import HtmlArchive
+
+    return parity_pages(HtmlArchive(archive_dir).iter_latest(), extractor, backends)
+
+
+def parity_pages(pages, extractor, backends=BACKENDS):
+    """parity() over (url, html) pairs"""
+    # extractors call parse_html() of the importable common.parsers, which
+    # under python -m common.parsers is not this module: switch that one
+    import common.parsers as parsers
+
+    previous = parsers.default_backend()
+    mismatches = []
+    checked = 0
+    for url, html in pages:
+        results = {}
+        try:
+            for backend in backends:
+                parsers.set_default_backend(backend)
+                results[backend] = extractor(html=html, url=url) or {}
+        finally:
+            parsers.set_default_backend(previous)
+        checked += 1
+
+        reference = results[backends[0]]
+        for field in sorted(set().union(*(r.keys() for r in results.values()))):
+            values = {backend: r.get(field) for backend, r in results.items()}
+            if any(value != reference.get(field) for value in values.values()):
+                mismatches.append((url, field, values))
+    return checked, mismatches
+
+
+def _measure(function):
+    # timed and traced separately, tracemalloc slows parsing down several times
+    started = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench(archive_dir, targets, backend=None):
+    """Time and peak Python memory of a full and a targeted parse of every
+    archived page. Yields (url, size, (full_s, full_peak), (targeted_s, targeted_peak))."""
+    from common.archive import HtmlArchive
+
+    for url, html in HtmlArchive(archive_dir).iter_latest():
+        full = _measure(lambda: parse_html(html, backend))
+        targeted = _measure(lambda: parse_html(html, backend, only=targets))
+        yield url, len(html), full, targeted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that every parser backend extracts the same fields")
+    sub = parser.add_subparsers(dest="command", required=True)
+    parity_cmd = sub.add_parser("parity")
+    parity_cmd.add_argument("archive", help="HtmlArchive directory to replay")
+    parity_cmd.add_argument("extractor", help="path/to/script.py:function taking html and url keyword arguments")
+    parity_cmd.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    bench_cmd = sub.add_parser("bench", help="compare full and targeted parse time and peak memory")
+    bench_cmd.add_argument("archive", help="HtmlArchive directory to replay")
+    bench_cmd.add_argument("targets", help="path/to/script.py:NAME of a Targets")
+    bench_cmd.add_argument("--backend", default="html.parser", choices=("html.parser", "lxml"))
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        rows = list(bench(args.archive, _load_attribute(args.targets), args.backend))
+        for url, size, (full_s, full_peak), (part_s, part_peak) in rows:
+            print(f"{url}  {size / 1024:.0f} KB  full {full_s * 1000:.1f} ms, {full_peak / 1024:.0f} KB peak"
+                  f"  targeted {part_s * 1000:.1f} ms, {part_peak / 1024:.0f} KB peak")
+        if rows:
+            for label, index in (("full", 2), ("targeted", 3)):
+                mean_s = sum(row[index][0] for row in rows) / len(rows)
+                peak = max(row[index][1] for row in rows)
+                print(f"{label}: mean {mean_s * 1000:.1f} ms per page, max {peak / 1024:.0f} KB peak")
+        print(f"{len(rows)} pages")
+        return 0
+
+    checked, mismatches = parity(args.archive, _load_attribute(args.extractor), tuple(args.backends))
+    for url, field, values in mismatches:
+        print(f"{url} [{field}]")
+        for backend, value in values.items():
+            print(f"    {backend}: {value!r:.200}")
+    print(f"{checked} pages, {len(mismatches)} mismatched fields")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    # run as common.parsers, the module extractors import, not as a second copy under __main__
+    from common.parsers import main
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+
+class PagePool:
+    """A fixed number of warm browser contexts, each holding one page.
+
+    A page (and its context) is thrown away and replaced after max_uses
+    navigations, or straight away if a handler raised while using it, so
+    long URL lists don't keep growing the browser's memory. on_page_closed,
+    if given, is called with every page thrown away.
+    """
+
+    def __init__(self, browser, size=4, max_uses=10, context_kwargs=None, on_new_page=None,
+                 on_page_closed=None):
+        self.browser = browser
+        self.size = size
+        self.max_uses = max_uses
+        self.context_kwargs = context_kwargs or {}
+        self.on_new_page = on_new_page
+        self.on_page_closed = on_page_closed
+        # idle slots; None stands for a slot whose page could not be replaced yet
+        self._idle = asyncio.Queue()
+
+    async def _new_slot(self):
+        context = await self.browser.new_context(**self.context_kwargs)
+        page = await context.new_page()
+        if self.on_new_page:
+            await self.on_new_page(page)
+        return {"context": context, "page": page, "uses": 0}
+
+    async def start(self):
+        slots = await asyncio.gather(*(self._new_slot() for _ in range(self.size)))
+        for slot in slots:
+            self._idle.put_nowait(slot)
+
+    async def _close_slot(self, slot):
+        if self.on_page_closed:
+            self.on_page_closed(slot["page"])
+        try:
+            await slot["context"].close()
+        except Exception as e:
+            print(f"Error closing browser context: {e}")
+
+    async def _recycle(self, slot):
+        await self._close_slot(slot)
+        try:
+            return await self._new_slot()
+        except Exception as e:
+            # hand the slot back empty, the next page() tries again
+            print(f"Error opening a new page: {e}")
+            return None
+
+    @asynccontextmanager
+    async def page(self):
+        slot = await self._idle.get()
+        if slot is None:
+            try:
+                slot = await self._new_slot()
+            except Exception:
+                self._idle.put_nowait(None)
+                raise
+        broken = False
+        try:
+            yield slot["page"]
+        except Exception:
+            broken = True
+            raise
+        finally:
+            try:
+                slot["uses"] += 1
+                if broken or slot["uses"] >= self.max_uses:
+                    slot = await self._recycle(slot)
+            finally:
+                self._idle.put_nowait(slot)
+
+    async def close(self):
+        while not self._idle.empty():
+            slot = self._idle.get_nowait()
+            if slot is not None:
+                await self._close_slot(slot)
+
+
+async def run_with_pages(urls, handler, size=4, max_uses=10, headless=True,
+                         launch_kwargs=None, context_kwargs=None, on_new_page=None, on_page_closed=None):
+    """Run await handler(page, url) for every url across a pool of pages.
+
+    Returns the handler results in the same order as urls, None for a url
+    whose handler raised; the page it raised on is replaced. on_new_page,
+    if given, is awaited on every fresh page before it is handed out, and
+    on_page_closed is called with every page the pool throws away.
+    """
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless, **(launch_kwargs or {}))
+        pool = PagePool(browser, size=size, max_uses=max_uses, context_kwargs=context_kwargs,
+                        on_new_page=on_new_page, on_page_closed=on_page_closed)
+        await pool.start()
+
+        async def run(url):
+            try:
+                async with pool.page() as page:
+                    return await handler(page, url)
+            except Exception as e:
+                print(f"Failed to process {url}: {e}")
+                return None
+
+        try:
+            return await asyncio.gather(*(run(url) for url in urls))
+        finally:
+            await pool.close()
+            await browser.close()
@@ -0,0 +1,56 @@
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class DomainRateLimiter:
+    """Token bucket per host.
+
+    rate is requests per second for any host not listed in rates, burst is how
+    many requests a host may make back to back after being idle, and each wait
+    gets up to jitter extra seconds so requests don't land on a fixed beat.
+    Hosts are independent, so a slow budget on one never delays another.
+    """
+
+    def __init__(self, rate=0.5, burst=1, jitter=0.0, rates=None):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.rates = dict(rates or {})
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def rate_for(self, host):
+        return self.rates.get(host, self.rate)
+
+    def _reserve(self, url):
+        """Take a token for the url's host and return how long to wait for it"""
+        host = urlsplit(url).netloc
+        rate = self.rate_for(host)
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, last = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * rate)
+            # going negative reserves a future token, so concurrent callers queue up
+            tokens -= 1
+            self._buckets[host] = (tokens, now)
+
+        wait = -tokens / rate if tokens < 0 else 0.0
+        if self.jitter:
+            wait += random.uniform(0, self.jitter)
+        return wait
+
+    def wait(self, url):
+        """Block until the url's host has budget for one more request"""
+        delay = self._reserve(url)
+        if delay:
+            time.sleep(delay)
+
+    async def wait_async(self, url):
+        """Asyncio version of wait, only suspends the calling task"""
+        delay = self._reserve(url)
+        if delay:
+            await asyncio.sleep(delay)
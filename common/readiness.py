@@ -0,0 +1,321 @@
+"""Wait for pages to be ready for extraction instead of sleeping a fixed time.
+
+A Readiness describes what a site's extractor needs: CSS selectors of
+which at least one must be present, how long the DOM must have been quiet
+before a page that never shows them counts as finished, and the old fixed
+timeout, which stays the longest anything may take. The wait runs as one
+script inside the page and returns as soon as
+
+- one of the selectors matches ("selector"), optionally after letting the
+  DOM settle for up to settle seconds, or
+- the page has finished loading and no mutation happened for quiet
+  seconds ("quiet"), unless the selectors are required, or
+- the deadline passed ("timeout").
+
+Every wait's duration is recorded per domain in a small SQLite file
+(.latency.sqlite, or $SCRAPER_LATENCY_DB). Once a domain has enough
+samples, its deadline becomes a high percentile of what it actually took,
+with some margin, instead of the worst case. A page that outlives a
+learned deadline is given the rest of the fixed timeout rather than
+failed, and its longer time pulls the deadline back up. To see what was
+learned:
+
+    python -m common.readiness stats
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_DB = ".latency.sqlite"
+
+# samples kept per key, older ones are dropped
+KEEP = 200
+
+_WAIT_JS = """
+([selectors, quietMs, settleMs, timeoutMs, required]) => new Promise((resolve) => {
+    const start = performance.now();
+    let lastChange = start;
+    let foundAt = null;
+    const observer = new MutationObserver(() => { lastChange = performance.now(); });
+    observer.observe(document.documentElement || document, {
+        childList: true, subtree: true, attributes: true, characterData: true,
+    });
+    const check = () => {
+        const now = performance.now();
+        let state = null;
+        if (foundAt === null && selectors.some((s) => document.querySelector(s))) {
+            foundAt = now;
+        }
+        if (foundAt !== null) {
+            if (now - lastChange >= Math.min(quietMs, settleMs) || now - foundAt >= settleMs) {
+                state = "selector";
+            }
+        } else if (!required && document.readyState === "complete" && now - lastChange >= quietMs) {
+            state = "quiet";
+        }
+        if (state === null && now - start >= timeoutMs) {
+            state = "timeout";
+        }
+        if (state === null) {
+            setTimeout(check, 50);
+        } else {
+            observer.disconnect();
+            resolve(state);
+        }
+    };
+    check();
+})
+"""
+
+# execute_async_script hands the callback in as the last argument
+_SELENIUM_WAIT_JS = (
+    "const done = arguments[arguments.length - 1];"
+    "(" + _WAIT_JS.strip() + ")(arguments[0]).then(done, () => done('timeout'));"
+)
+
+
+def db_path():
+    return os.environ.get("SCRAPER_LATENCY_DB", DEFAULT_DB)
+
+
+def set_db_path(path):
+    """Use path for latency samples, in this process and the workers it starts"""
+    os.environ["SCRAPER_LATENCY_DB"] = path
+
+
+def set_adaptive(enabled):
+    """Turn learned deadlines on or off, in this process and the workers it starts"""
+    if enabled:
+        os.environ.pop("SCRAPER_FIXED_WAITS", None)
+    else:
+        os.environ["SCRAPER_FIXED_WAITS"] = "1"
+
+
+def adaptive():
+    return not os.environ.get("SCRAPER_FIXED_WAITS")
+
+
+class LatencyStats:
+    """Recent readiness wait durations per key, kept in a small SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS samples ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " key TEXT NOT NULL,"
+            " seconds REAL NOT NULL,"
+            " state TEXT NOT NULL,"
+            " recorded_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS samples_key ON samples (key, id)")
+        self.conn.commit()
+
+    def record(self, key, seconds, state):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO samples (key, seconds, state, recorded_at) VALUES (?, ?, ?, ?)",
+                (key, seconds, state, time.time()),
+            )
+            self.conn.execute(
+                "DELETE FROM samples WHERE key = ? AND id <= ("
+                " SELECT id FROM samples WHERE key = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (key, key, KEEP),
+            )
+            self.conn.commit()
+
+    def samples(self, key):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT seconds FROM samples WHERE key = ? ORDER BY id DESC LIMIT ?", (key, KEEP)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def keys(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT DISTINCT key FROM samples ORDER BY key")]
+
+    def close(self):
+        self.conn.close()
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) of values, interpolated between the nearest ranks"""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+_stats = {}
+
+
+def shared_stats():
+    """The LatencyStats of this process for the current db_path()"""
+    key = (os.getpid(), db_path())
+    stats = _stats.get(key)
+    if stats is None:
+        stats = _stats[key] = LatencyStats(key[1])
+    return stats
+
+
+class Readiness:
+    """What a site's pages need before extraction, and how long that may take.
+
+    selectors: CSS selectors, any one of which means the content is there.
+    timeout: the longest wait in seconds, also the deadline until the
+    domain has min_samples recorded waits. After that the deadline is the
+    q-th percentile of those waits times margin, kept between floor and
+    timeout. quiet: seconds without DOM changes after which a loaded page
+    without any of the selectors counts as finished. required: the page is
+    never finished without one of the selectors, only the selector or the
+    timeout end the wait (for content that arrives late into an idle page).
+    settle: after a selector matched, how long to let the DOM keep changing
+    before giving up on it going quiet (0 returns at once). name: separates
+    the stats of different kinds of pages on one domain.
+    """
+
+    def __init__(self, selectors=(), timeout=15, quiet=1.0, settle=0, name=None, required=False,
+                 q=95, margin=1.5, floor=3, min_samples=10):
+        self.selectors = list(selectors)
+        self.timeout = timeout
+        self.quiet = quiet
+        self.required = required
+        self.settle = settle
+        self.name = name
+        self.q = q
+        self.margin = margin
+        self.floor = floor
+        self.min_samples = min_samples
+
+    def key(self, url):
+        host = urlsplit(url).netloc.lower()
+        return f"{host} {self.name}" if self.name else host
+
+    def deadline(self, url):
+        """Seconds this page may take, learned from the domain's past waits"""
+        if not adaptive():
+            return self.timeout
+        samples = shared_stats().samples(self.key(url))
+        if len(samples) < self.min_samples:
+            return self.timeout
+        learned = percentile(samples, self.q) * self.margin
+        return max(self.floor, min(self.timeout, learned))
+
+    def _arguments(self, remaining):
+        return [self.selectors, int(self.quiet * 1000), int(self.settle * 1000), int(max(remaining, 0) * 1000),
+                self.required]
+
+    def _soft_timeout(self, error, deadline):
+        # a Playwright TimeoutError under a learned deadline shorter than the fixed one
+        return type(error).__name__ == "TimeoutError" and deadline < self.timeout
+
+    @staticmethod
+    def _left(started, deadline):
+        return max(deadline - (time.monotonic() - started), 0.001)
+
+    def _record(self, url, started, state):
+        try:
+            shared_stats().record(self.key(url), time.monotonic() - started, state)
+        except sqlite3.Error as e:
+            print(f"Could not record latency for {url}: {e}")
+
+    # Selenium
+
+    def wait(self, driver, url, started=None, deadline=None):
+        """Wait in a Selenium driver for the page at url; returns the state reached.
+
+        started is when loading began (default: now), so the recorded latency
+        can include the navigation or click that led here.
+        """
+        started = started or time.monotonic()
+        deadline = deadline or self.deadline(url)
+        state = self._run_wait(driver, started, deadline)
+        if state == "timeout" and deadline < self.timeout:
+            # the learned deadline was too tight for this page: allow up to the full timeout
+            state = self._run_wait(driver, started, self.timeout)
+        self._record(url, started, state)
+        return state
+
+    def _run_wait(self, driver, started, deadline):
+        for attempt in range(3):
+            remaining = self._left(started, deadline)
+            driver.set_script_timeout(remaining + 10)
+            try:
+                return driver.execute_async_script(_SELENIUM_WAIT_JS, self._arguments(remaining))
+            except Exception as e:
+                # the page navigated away under the script (a redirect or a form submit): wait on the new one
+                if type(e).__name__ != "JavascriptException" or attempt == 2:
+                    raise
+
+    def load(self, driver, url):
+        """driver.get(url), then wait for it to be ready; returns the state reached"""
+        started = time.monotonic()
+        deadline = self.deadline(url)
+        driver.get(url)
+        return self.wait(driver, url, started, deadline)
+
+    # Playwright
+
+    def goto(self, page, url):
+        """page.goto(url) up to DOMContentLoaded, then wait for it to be ready"""
+        started = time.monotonic()
+        deadline = self.deadline(url)
+        try:
+            page.goto(url, timeout=deadline * 1000, wait_until="domcontentloaded")
+        except Exception as e:
+            if not self._soft_timeout(e, deadline):
+                raise
+            # the learned deadline was too tight for this page: allow up to the full timeout
+            deadline = self.timeout
+            page.wait_for_load_state("domcontentloaded", timeout=self._left(started, deadline) * 1000)
+        state = page.evaluate(_WAIT_JS, self._arguments(self._left(started, deadline)))
+        self._record(url, started, state)
+        return state
+
+    async def goto_async(self, page, url):
+        """Asyncio version of goto"""
+        started = time.monotonic()
+        deadline = self.deadline(url)
+        try:
+            await page.goto(url, timeout=deadline * 1000, wait_until="domcontentloaded")
+        except Exception as e:
+            if not self._soft_timeout(e, deadline):
+                raise
+            deadline = self.timeout
+            await page.wait_for_load_state("domcontentloaded", timeout=self._left(started, deadline) * 1000)
+        state = await page.evaluate(_WAIT_JS, self._arguments(self._left(started, deadline)))
+        self._record(url, started, state)
+        return state
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m common.readiness",
+                                     description="Show the page readiness latencies learned per domain")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats_parser = commands.add_parser("stats", help="percentiles of the recorded waits")
+    stats_parser.add_argument("--db", default=db_path(), help="latency database (default: %(default)s)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist")
+    stats = LatencyStats(args.db)
+    print(f"{'key':40} {'n':>4} {'p50':>7} {'p90':>7} {'p95':>7} {'max':>7}")
+    for key in stats.keys():
+        samples = stats.samples(key)
+        print(f"{key:40} {len(samples):>4} " + " ".join(
+            f"{percentile(samples, q):>7.2f}" for q in (50, 90, 95, 100)))
+    stats.close()
+
+
+if __name__ == "__main__":
+    main()
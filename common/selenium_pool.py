@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+from multiprocessing.util import Finalize
+
+from selenium.common.exceptions import WebDriverException
+
+# state of the pool worker process this module is loaded in
+_driver = None
+_driver_factory = None
+
+
+def _quit_driver():
+    global _driver
+    if _driver is not None:
+        try:
+            _driver.quit()
+        except Exception:
+            pass
+        _driver = None
+
+
+def _init_worker(driver_factory):
+    global _driver_factory
+    _driver_factory = driver_factory
+    # quit this worker's browser when the pool shuts the worker down
+    Finalize(None, _quit_driver, exitpriority=10)
+
+
+def _get_driver():
+    global _driver
+    if _driver is None:
+        _driver = _driver_factory()
+    return _driver
+
+
+def _driver_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+
+def _run_task(args):
+    task, item, retries = args
+    for attempt in range(retries + 1):
+        driver = _get_driver()
+        try:
+            result = task(driver, item)
+        except WebDriverException as e:
+            print(f"[pid {os.getpid()}] Driver error on {item}: {e}")
+            result = None
+
+        if _driver_alive(driver):
+            return result
+
+        # browser crashed or hung up, start a fresh one and try the item again
+        print(f"[pid {os.getpid()}] Driver died on {item}, restarting (attempt {attempt + 1})")
+        _quit_driver()
+    return result
+
+
+def run_with_drivers(items, task, driver_factory, processes=None, retries=1, max_tasks_per_child=None):
+    """Run task(driver, item) for every item on a pool of browser processes.
+
+    Each worker process lazily builds its own driver with driver_factory and
+    keeps it for all of its items, restarting it if it dies. task and
+    driver_factory must be module level functions so they can be pickled.
+    Yields results in the same order as items.
+    """
+    processes = processes or os.cpu_count() or 1
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(driver_factory,),
+                              maxtasksperchild=max_tasks_per_child) as pool:
+        jobs = ((task, item, retries) for item in items)
+        yield from pool.imap(_run_task, jobs)
+        pool.close()
+        pool.join()
@@ -0,0 +1,55 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.httpcache import CachingAdapter
+
+# urllib3 keeps one connection pool per host; pool_connections is how many
+# host pools are cached and pool_maxsize how many keep-alive sockets each holds
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+_sessions = {}
+
+
+def make_session(headers=None, cookies=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, cache=None):
+    """Build a requests.Session with sized keep-alive pools and preloaded headers/cookies.
+
+    Pass an HttpCache as cache to revalidate GETs against it instead of
+    downloading unchanged pages again.
+    """
+    session = requests.Session()
+    if cache is not None:
+        adapter = CachingAdapter(cache, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    if headers:
+        session.headers.update(headers)
+    if cookies:
+        session.cookies.update(cookies)
+    return session
+
+
+def get_session(name="default", headers=None, cookies=None, **session_kwargs):
+    """Return the shared session registered under name, creating it on first use.
+
+    headers, cookies, pool sizes and cache only apply when the session is
+    created, so every later call for the same name reuses the same pooled
+    connections.
+    """
+    session = _sessions.get(name)
+    if session is None:
+        session = make_session(headers=headers, cookies=cookies, **session_kwargs)
+        _sessions[name] = session
+    return session
+
+
+def close_sessions():
+    """Close every shared session and drop its pooled connections"""
+    for session in _sessions.values():
+        session.close()
+    _sessions.clear()
@@ -1,141 +1,247 @@
 from datetime import datetime
 from zoneinfo import ZoneInfo
-import json
+import os
+import sys
 from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
 
-def extract_article_data(page, url):
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.archive import HtmlArchive
+from common.blocking import BlockPolicy, install_route_blocking
+from common.checkpoint import open_checkpoint
+from common.cli import (archive_args, fetch_args, follow_args, open_archive, open_http_cache, readiness_args,
+                        scraper_args)
+from common.hybrid import http_first
+from common.liveblog import entry_record, follow, iter_entries, state_path
+from common.output import open_output
+from common.parsers import parse_html
+from common.ratelimit import DomainRateLimiter
+from common.readiness import Readiness
+
+# only the DOM is read, so skip images, fonts, video and ad/analytics hosts
+BLOCK_POLICY = BlockPolicy()
+
+# article body or liveblog entries, whichever the page has
+READY = Readiness(["div.the-content", 'div[id^="liveblog-entry"]'], timeout=60)
+
+def format_timestamp(timestamp_text):
     try:
-        page.goto(url, timeout=60000)
-        page.wait_for_load_state("load")
-
-        # Save the page HTML locally
-        with open("body.html", "wb") as html_file:
-            html_file.write(page.content().encode("utf-8"))
-
-        # Headline
-        headline = page.query_selector("h1.headline")
-        headline_text = headline.text_content().strip() if headline else "N/A"
-
-        # Subheading
-        subheading = page.query_selector("h2.underline")
-        subheading_text = subheading.text_content().strip() if subheading else "N/A"
-
-        # Timestamp
-        timestamp_tag = page.query_selector("span.date")
-        timestamp_text = timestamp_tag.text_content().strip() if timestamp_tag else "N/A"
-
-        # Format timestamp
-       # Format timestamp
-        try:
-            if timestamp_text != "N/A":
-                timestamp_dt = datetime.strptime(timestamp_text, "%d %B %Y, %I:%M %p")
-                local_dt = timestamp_dt.replace(tzinfo=ZoneInfo("Asia/Kolkata"))
-            else:
-                raise ValueError("Missing or invalid timestamp")
-
-            date_text = local_dt.strftime("Updated %I:%M %p GMT+5:30, %B %d, %Y")
-
-        except (ValueError, TypeError):
-            now_ist = datetime.now(ZoneInfo("Asia/Kolkata"))
-            date_text = now_ist.strftime("Updated %I:%M %p GMT+5:30, %B %d, %Y")
-
-
-        # Article body from .the-content
-        article_text = "N/A"
-        article_div = page.query_selector("div.the-content")
-        if article_div:
-            paragraphs = article_div.query_selector_all("p")
-            article_text = "\n".join([p.text_content().strip() for p in paragraphs if p.text_content().strip()])
-
-        # Image URLs (featured + inline)
-      # Image URLs (featured + inline)
-# Only use the first featured image (if any)
-        image = None
-        image_element = page.query_selector("img.wp-post-image, div.media-rslides img")
-        if image_element:
-            image = image_element.get_attribute("src")
-
-        # Liveblog entries using BeautifulSoup
-        soup = BeautifulSoup(page.content(), "html.parser")
-        entries = soup.find_all('div', id=lambda x: x and x.startswith('liveblog-entry'))
-
-        liveblog_entries = []
-        for entry in entries:
-            heading_tag = entry.find('h4')
-            heading = heading_tag.get_text() if heading_tag else None
-            heading_link = heading_tag.find('a')['href'] if heading_tag and heading_tag.find('a') else None
-
-            date_tag = entry.find('div', class_='liveblog-date')
-            date = date_tag.get_text() if date_tag else None
-
-            author_tag = entry.find('div', class_='byline')
-            author = author_tag.get_text() if author_tag else None
-            author_link = author_tag.find('a')['href'] if author_tag and author_tag.find('a') else None
-
-            media_tag = entry.find('div', class_='media')
-            image_url = media_tag.find('img')['src'] if media_tag and media_tag.find('img') else None
-            caption = media_tag.find('div', class_='caption').get_text() if media_tag and media_tag.find('div', class_='caption') else None
-
-            paragraphs = entry.find_all('p')
-            content = " ".join([para.get_text() for para in paragraphs]) if paragraphs else None
-
-            social_links = {}
-            social_media = entry.find('ul', class_='social')
-            if social_media:
-                for social_tag in social_media.find_all('a', href=True):
-                    social_platform = social_tag['class'][0] if social_tag.get('class') else 'unknown'
-                    social_links[social_platform] = social_tag['href']
-
-            liveblog_entries.append({
-                "heading": heading,
-                "heading_link": heading_link,
-                "date": date,
-                "author": author,
-                "author_link": author_link,
-                "image_url": image_url,
-                "caption": caption,
-                "content": content,
-                "social_links": social_links
-            })
+        if timestamp_text != "N/A":
+            timestamp_dt = datetime.strptime(timestamp_text, "%d %B %Y, %I:%M %p")
+            local_dt = timestamp_dt.replace(tzinfo=ZoneInfo("Asia/Kolkata"))
+        else:
+            raise ValueError("Missing or invalid timestamp")
+
+        return local_dt.strftime("Updated %I:%M %p GMT+5:30, %B %d, %Y")
+
+    except (ValueError, TypeError):
+        now_ist = datetime.now(ZoneInfo("Asia/Kolkata"))
+        return now_ist.strftime("Updated %I:%M %p GMT+5:30, %B %d, %Y")
+
+def parse_liveblog_entries(html):
+    return [entry_record(entry) for entry in iter_entries(html)]
+
+# Every field, liveblog entries included, gathered in the page in one
+# page.evaluate() round trip. Liveblog text skips <script>/<style> contents
+# the way BeautifulSoup's get_text() does, so replayed pages match.
+EXTRACT_ARTICLE_JS = """
+(withHtml) => {
+    const trimmed = (el) => el ? el.textContent.trim() : "N/A";
+    const text = (el) => {
+        const parts = [];
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) {
+            const parent = walker.currentNode.parentElement;
+            if (!parent || !parent.closest("script, style, template") || el.matches("script, style, template")) {
+                parts.push(walker.currentNode.data);
+            }
+        }
+        return parts.join("");
+    };
+    const attr = (el, name) => el ? el.getAttribute(name) : null;
+
+    const articleDiv = document.querySelector("div.the-content");
+    const paragraphs = articleDiv
+        ? Array.from(articleDiv.querySelectorAll("p"), (p) => p.textContent.trim()).filter(Boolean)
+        : null;
+
+    const entries = Array.from(document.querySelectorAll('div[id^="liveblog-entry"]'), (entry) => {
+        const heading = entry.querySelector("h4");
+        const author = entry.querySelector("div.byline");
+        const media = entry.querySelector("div.media");
+        const date = entry.querySelector("div.liveblog-date");
+        const caption = media && media.querySelector("div.caption");
+        const paras = entry.querySelectorAll("p");
+        const social = entry.querySelector("ul.social");
+        const socialLinks = {};
+        if (social) {
+            for (const link of social.querySelectorAll("a[href]")) {
+                socialLinks[link.classList[0] || "unknown"] = link.getAttribute("href");
+            }
+        }
+        return {
+            heading: heading ? text(heading) : null,
+            heading_link: attr(heading && heading.querySelector("a"), "href"),
+            date: date ? text(date) : null,
+            author: author ? text(author) : null,
+            author_link: attr(author && author.querySelector("a"), "href"),
+            image_url: attr(media && media.querySelector("img"), "src"),
+            caption: caption ? text(caption) : null,
+            content: paras.length ? Array.from(paras, text).join(" ") : null,
+            social_links: socialLinks,
+        };
+    });
+
+    let html = null;
+    if (withHtml) {
+        const doctype = document.doctype ? new XMLSerializer().serializeToString(document.doctype) : "";
+        html = doctype + document.documentElement.outerHTML;
+    }
+
+    return {
+        headline: trimmed(document.querySelector("h1.headline")),
+        subheading: trimmed(document.querySelector("h2.underline")),
+        timestamp: trimmed(document.querySelector("span.date")),
+        article: paragraphs ? paragraphs.join("\\n") : "N/A",
+        image: attr(document.querySelector("img.wp-post-image, div.media-rslides img"), "src"),
+        liveblog_entries: entries,
+        html: html,
+    };
+}
+"""
+
+def extract_article_data(page, url, archive=None):
+    try:
+        READY.goto(page, url)
+
+        # one IPC round trip for every field; the HTML only comes back when archiving
+        fields = page.evaluate(EXTRACT_ARTICLE_JS, archive is not None)
+
+        # Keep the page HTML in the archive, written in the background
+        if archive:
+            archive.put(url, fields["html"])
 
         return {
             "url": url,
-            "headline": headline_text,
-            "subheading": subheading_text,
-            "date": date_text,
-            "article": article_text,
-            "image": image,
-            "liveblog_entries": liveblog_entries
+            "headline": fields["headline"],
+            "subheading": fields["subheading"],
+            "date": format_timestamp(fields["timestamp"]),
+            "article": fields["article"],
+            "image": fields["image"],
+            "liveblog_entries": fields["liveblog_entries"]
         }
 
     except Exception as e:
         print(f"Failed to process {url}: {e}")
         return None
 
-# Main scraping flow
-def main():
-    with open("TOIsrael_article_links_v2.txt", "r", encoding="utf-8") as file:
-        urls = [line.strip() for line in file if line.strip()]
+def parse_article_html(html, url):
+    """Same fields as extract_article_data, from saved HTML instead of a live page"""
+    doc = parse_html(html)
 
-    all_articles = []
+    headline = doc.select_one("h1.headline")
+    headline_text = headline.text().strip() if headline else "N/A"
 
+    subheading = doc.select_one("h2.underline")
+    subheading_text = subheading.text().strip() if subheading else "N/A"
+
+    timestamp_tag = doc.select_one("span.date")
+    timestamp_text = timestamp_tag.text().strip() if timestamp_tag else "N/A"
+
+    article_text = "N/A"
+    article_div = doc.select_one("div.the-content")
+    if article_div:
+        paragraphs = article_div.select("p")
+        article_text = "\n".join([p.text().strip() for p in paragraphs if p.text().strip()])
+
+    image_element = doc.select_one("img.wp-post-image, div.media-rslides img")
+    image = image_element.get("src") if image_element else None
+
+    return {
+        "url": url,
+        "headline": headline_text,
+        "subheading": subheading_text,
+        "date": format_timestamp(timestamp_text),
+        "article": article_text,
+        "image": image,
+        "liveblog_entries": parse_liveblog_entries(html)
+    }
+
+def scrape_in_browser(todo, checkpoint, output, archive):
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False)
         page = browser.new_page()
+        block_stats = install_route_blocking(page, BLOCK_POLICY)
 
-        for url in urls:
-            article_data = extract_article_data(page, url)
+        for url in todo:
+            block_stats.reset()
+            article_data = extract_article_data(page, url, archive)
+            print(block_stats.summary(url))
             if article_data:
-                all_articles.append(article_data)
+                checkpoint.mark_done(url, output.write(article_data))
+            else:
+                checkpoint.mark_failed(url)
 
         browser.close()
 
-    # Save output to JSON
-    with open("all_articles_output.json", "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+# Main scraping flow
+def main(links_file="TOIsrael_article_links_v2.txt"):
+    args = fetch_args(readiness_args(follow_args(archive_args(scraper_args(
+        f"Scrape Times of Israel articles listed in {links_file}"))))).parse_args()
+
+    with open(links_file, "r", encoding="utf-8") as file:
+        urls = [line.strip() for line in file if line.strip()]
 
-    print("Saved all articles to all_articles_output.json")
+    if args.follow:
+        # plain HTTP polling, only entries not seen on an earlier poll are written
+        follow(urls, "liveblog_updates.jsonl", state_path("liveblog_updates.jsonl"), record=entry_record,
+               interval=args.interval, known_run=args.known_run, max_polls=args.max_polls)
+        return
+
+    # --resume skips URLs already saved and retries failed or missing ones
+    checkpoint = open_checkpoint("all_articles_output.json", jsonl=args.jsonl, resume=args.resume)
+    todo = checkpoint.pending(urls)
+    if args.resume:
+        print(f"Resuming: {len(urls) - len(todo)} URLs already done")
+
+    if args.replay:
+        # no browser: re-extract from the archived pages of these URLs
+        with checkpoint, open_output("all_articles_output.json", jsonl=args.jsonl,
+                                     fsync_every=args.fsync_every, order=urls, resume=args.resume) as output:
+            for url, html in HtmlArchive(args.replay).iter_latest(set(todo)):
+                checkpoint.mark_done(url, output.write(parse_article_html(html, url)))
+        print(f"Saved {output.count} replayed articles to {output.path}")
+        return
+
+    archive = open_archive(args)
+
+    # Save output to JSON, or line by line with --jsonl
+    with checkpoint, open_output("all_articles_output.json", jsonl=args.jsonl, fsync_every=args.fsync_every,
+                                 order=urls, resume=args.resume) as output:
+        def save_http(url, html):
+            article_data = parse_article_html(html, url)
+            # no headline over HTTP: let the browser try
+            if article_data["headline"] == "N/A" and args.fetch == "hybrid":
+                return False
+            if archive:
+                archive.put(url, html)
+            checkpoint.mark_done(url, output.write(article_data))
+
+        todo = http_first(todo, READY.selectors, save_http, mode=args.fetch,
+                          limiter=DomainRateLimiter(rate=1, jitter=0.5), cache=open_http_cache(args))
+        if args.fetch == "http":
+            for url in todo:
+                checkpoint.mark_failed(url)
+            todo = []
+        elif todo:
+            print(f"{len(todo)} URLs need the browser")
+
+        if todo:
+            scrape_in_browser(todo, checkpoint, output, archive)
+
+    if archive:
+        archive.close()
+
+    print(f"Saved all articles to {output.path}")
 
 if __name__ == "__main__":
     main()
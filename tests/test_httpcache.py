@@ -0,0 +1,97 @@
+"""The on-disk HTTP cache against a local server: hits, 304 revalidation, eviction."""
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from common.fetch import fetch_all
+from common.httpcache import HttpCache
+from common.sessions import make_session
+
+BODY_SIZE = 1000
+
+
+class Handler(BaseHTTPRequestHandler):
+    # (path, status) of every request the server answered
+    seen = []
+
+    def do_GET(self):
+        etag = f'"{self.path}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.seen.append((self.path, 304))
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = self.path.encode("utf-8").ljust(BODY_SIZE, b".")
+        self.seen.append((self.path, 200))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_session_revalidates_and_serves_the_cached_body(server, tmp_path):
+    cache = HttpCache(str(tmp_path / "cache"))
+    session = make_session(cache=cache)
+
+    first = session.get(f"{server}/a")
+    second = session.get(f"{server}/a")
+
+    assert (first.status_code, first.from_cache) == (200, False)
+    assert (second.status_code, second.from_cache) == (200, True)
+    assert second.text == first.text
+    assert Handler.seen == [("/a", 200), ("/a", 304)]
+    session.close()
+    cache.close()
+
+
+def test_fetch_all_hits_the_cache_a_session_filled(server, tmp_path):
+    cache = HttpCache(str(tmp_path / "cache"))
+    session = make_session(cache=cache)
+    expected = session.get(f"{server}/b").text
+    session.close()
+
+    results = fetch_all([f"{server}/b"], lambda url, status, text: (status, text), cache=cache)
+
+    assert results == [(200, expected)]
+    assert Handler.seen == [("/b", 200), ("/b", 304)]
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(server, tmp_path):
+    cache = HttpCache(str(tmp_path / "cache"), max_bytes=2 * BODY_SIZE)
+    session = make_session(cache=cache)
+
+    session.get(f"{server}/old")
+    session.get(f"{server}/kept")
+    session.get(f"{server}/old")  # revalidated, so /kept is now the oldest
+    session.get(f"{server}/new")
+
+    assert cache.lookup(f"{server}/kept") is None
+    assert cache.lookup(f"{server}/old") is not None
+    assert cache.lookup(f"{server}/new") is not None
+    # the evicted body is gone from disk too
+    assert sum(len(files) for _, _, files in os.walk(tmp_path / "cache" / "bodies")) == 2
+    session.close()
+    cache.close()
@@ -0,0 +1,85 @@
+"""The single-pass liveblog parser against the BeautifulSoup walk it replaced."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from common.liveblog import entry_record, iter_entries
+from common.parsers import parse_html
+
+
+def soup_entries(html):
+    # fix/timesofisrael.py parse_liveblog_entries before the single pass
+    records = []
+    for entry in parse_html(html, backend="html.parser").select('div[id^="liveblog-entry"]'):
+        heading_tag = entry.select_one("h4")
+        heading_anchor = heading_tag.select_one("a") if heading_tag else None
+        date_tag = entry.select_one("div.liveblog-date")
+        author_tag = entry.select_one("div.byline")
+        author_anchor = author_tag.select_one("a") if author_tag else None
+        media_tag = entry.select_one("div.media")
+        media_img = media_tag.select_one("img") if media_tag else None
+        caption_tag = media_tag.select_one("div.caption") if media_tag else None
+        paragraphs = entry.select("p")
+
+        social_links = {}
+        social_media = entry.select_one("ul.social")
+        if social_media:
+            for social_tag in social_media.select("a[href]"):
+                social_links[social_tag.classes[0] if social_tag.classes else "unknown"] = social_tag.get("href")
+
+        records.append({
+            "heading": heading_tag.text() if heading_tag else None,
+            "heading_link": heading_anchor.get("href") if heading_anchor else None,
+            "date": date_tag.text() if date_tag else None,
+            "author": author_tag.text() if author_tag else None,
+            "author_link": author_anchor.get("href") if author_anchor else None,
+            "image_url": media_img.get("src") if media_img else None,
+            "caption": caption_tag.text() if caption_tag else None,
+            "content": " ".join(p.text() for p in paragraphs) if paragraphs else None,
+            "social_links": social_links,
+        })
+    return records
+
+
+def entry(number, inner=""):
+    return (f'<div id="liveblog-entry-{number}"><div class="liveblog-date">{number}:00 pm</div>'
+            f'<div class="liveblog-paragraph"><h4><a href="/e/{number}">Entry {number}</a></h4>'
+            f'<div class="byline">By <a href="/w/{number}">Writer {number}</a></div>'
+            f'<p>First of {number}</p><p>Second of {number}</p>'
+            f'<ul class="social"><li><a class="facebook" href="https://fb/{number}">f</a></li></ul>'
+            f'</div>{inner}</div>')
+
+
+CASES = {
+    "flat": entry(1) + entry(2),
+    "nested": entry(1, entry(2, entry(3))) + entry(4),
+    "nested after siblings": entry(1) + entry(2, entry(3) + entry(4)) + entry(5),
+    "nested in a social list": (
+        '<div id="liveblog-entry-1"><h4>Outer</h4><ul class="social"><li><a class="twitter" href="https://x/1">x</a>'
+        '<div id="liveblog-entry-2"><h4>Inner</h4><p>inner text</p><a class="share" href="https://s/2">s</a></div>'
+        '</li></ul></div>'
+    ),
+    "nested in a heading and a byline": (
+        '<div id="liveblog-entry-1"><h4>Outer <div id="liveblog-entry-2"><a href="/inner">inner</a></div></h4>'
+        '<div class="byline">By <div id="liveblog-entry-3"><a href="/w/3">w</a></div></div></div>'
+    ),
+    "media without an image": (
+        '<div id="liveblog-entry-1"><div class="media"><div class="caption">No picture</div></div>'
+        '<p>text</p></div>'
+    ),
+}
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_matches_the_soup_walk_in_document_order(name):
+    html = f'<html><body><div class="liveblog">{CASES[name]}</div></body></html>'
+    assert [entry_record(e) for e in iter_entries(html)] == soup_entries(html)
+
+
+def test_nested_entries_stream_in_document_order():
+    html = CASES["nested"] + CASES["nested in a social list"].replace("entry-1", "entry-5").replace("entry-2", "entry-6")
+    chunks = [html[i:i + 37] for i in range(0, len(html), 37)]
+    assert [e.id for e in iter_entries(chunks)] == [f"liveblog-entry-{n}" for n in (1, 2, 3, 4, 5, 6)]
@@ -0,0 +1,63 @@
+"""Every parser backend must extract the same fields from the fixture pages.
+
+Runs the scrapers' own extractors through common.parsers.parity_pages, the
+check behind python -m common.parsers parity.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from common import parsers
+from common.parsers import BACKENDS, _load_attribute, parity_pages
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+# fixture page, extractor, a field that must come out of the page
+CASES = [
+    ("politico.html", "POLITICO/politico_scraper.py:parse_politico_html", "article"),
+    ("wsj.html", "WSJ/wsj_scrapper.py:parse_wsj_article", "article_text"),
+    ("hill.html", "Hill/thehill_scraper.py:parse_thehill_article", "article_text"),
+    ("reuters.html", "06-05-2025/reuters.py:parse_article_data", "content"),
+    ("washington.html", "Washington/washington_post.py:parse_article_html", "article"),
+    ("boodmo_part.html", "03-05-2025/sheet.py:parse_part_details", "rows"),
+]
+
+
+def _page(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def _extractor(spec):
+    function = _load_attribute(os.path.join(ROOT, spec))
+    if spec.endswith(":parse_part_details"):
+        # one record per compatibility row, compared as a whole
+        return lambda html, url: {"rows": function(html, "15208-65F0C")}
+    return function
+
+
+@pytest.mark.parametrize("name, spec, field", CASES)
+def test_backends_extract_the_same_fields(name, spec, field):
+    extractor = _extractor(spec)
+    url = f"https://example.com/{name}"
+    checked, mismatches = parity_pages([(url, _page(name))], extractor, BACKENDS)
+
+    assert checked == 1
+    assert mismatches == []
+    reference = extractor(html=_page(name), url=url)
+    assert reference[field] not in (None, "", [], "N/A", "No article content found")
+
+
+def test_parity_sees_the_backend_extractors_use():
+    def backend_dependent(html, url):
+        return {"backend": parsers.default_backend(), "node": type(parsers.parse_html(html)).__name__}
+
+    before = parsers.default_backend()
+    checked, mismatches = parity_pages([("https://example.com/", _page("hill.html"))], backend_dependent, BACKENDS)
+
+    assert checked == 1
+    assert {field for _, field, _ in mismatches} == {"backend", "node"}
+    assert parsers.default_backend() == before
@@ -0,0 +1,72 @@
+"""Normalized scorecard storage: malformed payloads and bowling totals."""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Scoreboard"))
+from poller import MatchPoller
+from scorecard_store import MalformedScorecard, ParquetStore, SqliteStore, normalize, totals
+
+
+def payload(overs="9.3", balls=None, runs=38):
+    bowler = {"bowlerName": "J Bumrah", "overs": overs, "runs": runs, "wickets": 2}
+    if balls is not None:
+        bowler["balls"] = balls
+    return {"doc": [{"_id": "m1", "data": {"score": {
+        "matchTitle": "A v B", "matchstatus": "live",
+        "innings": [{"inningNumber": 1,
+                     "batsmen": [{"batsmanName": "A Sharma", "runs": 15, "balls": 10}],
+                     "bowlers": [bowler]}],
+    }}}]}
+
+
+@pytest.mark.parametrize("data", [
+    ["not", "a", "scorecard"],
+    {"doc": [{"data": {"score": "oops"}}]},
+    {"doc": ["oops"]},
+    {"innings": ["oops"]},
+    {"innings": [{"bowlers": ["oops"]}]},
+])
+def test_malformed_payload_raises(data):
+    with pytest.raises(MalformedScorecard):
+        normalize(data)
+
+
+def test_poller_skips_malformed_payload_and_keeps_polling(tmp_path):
+    with SqliteStore(str(tmp_path / "season.sqlite")) as store:
+        match = MatchPoller("http://127.0.0.1/", prefix=str(tmp_path / "m1"), label="m1", store=store)
+        assert match.handle({"doc": [{"_id": "m1", "data": {"score": ["oops"]}}]}) > 0
+        assert match.handle(payload()) > 0
+
+        columns, rows = store.query("SELECT match_id, bowler FROM bowling")
+        assert rows == [("m1", "J Bumrah")]
+
+
+def test_bowling_totals_count_balls_of_partial_overs(tmp_path):
+    sqlite_store = SqliteStore(str(tmp_path / "season.sqlite"))
+    parquet_store = ParquetStore(str(tmp_path / "season"))
+    for store in (sqlite_store, parquet_store):
+        store.append(normalize(payload(overs="9.3"), match_id="m1"))
+        store.append(normalize(payload(overs="4", balls=2, runs=20), match_id="m2"))
+        columns, rows = totals(store, "bowling")
+        # 9.3 overs are 57 balls, 4 overs and 2 balls 26
+        assert rows == [("J Bumrah", 2, 83, None, 58, 4, round(6 * 58 / 83, 2))]
+    sqlite_store.close()
+
+
+def test_old_database_gets_legal_balls_backfilled(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE bowling (match_id TEXT, polled_at TEXT, snapshot INTEGER, inning INTEGER,"
+                 " bowler TEXT, overs REAL, balls INTEGER, maidens INTEGER, runs INTEGER, wickets INTEGER,"
+                 " economy REAL)")
+    conn.execute("INSERT INTO bowling VALUES ('m1', '2025-05-01 10:00:00', 1, 1, 'J Bumrah', 9.3, NULL,"
+                 " 0, 38, 2, 4.0)")
+    conn.commit()
+    conn.close()
+
+    with SqliteStore(path) as store:
+        assert store.query("SELECT legal_balls FROM bowling")[1] == [(57,)]
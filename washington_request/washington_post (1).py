@@ -1,8 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
 import json
-import time
-import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.checkpoint import open_checkpoint
+from common.cli import embedded_args, open_http_cache, scraper_args
+from common.embedded import dig, element_texts, script_json, with_fallback
+from common.fetch import fetch_all
+from common.output import open_output
+from common.parsers import parse_html
+from common.ratelimit import DomainRateLimiter
+from common.sessions import get_session
 
 def load_browser_cookies(filepath):
     with open(filepath, "r") as f:
@@ -10,39 +18,43 @@ def load_browser_cookies(filepath):
     return {cookie["name"]: cookie["value"] for cookie in raw_cookies}
 
 def scrape_article(url, cookies, headers):
-    response = requests.get(url, headers=headers, cookies=cookies)
+    response = get_session("washingtonpost", headers=headers, cookies=cookies).get(url)
     if response.status_code != 200:
         print(f" Failed to fetch {url}. Status code: {response.status_code}")
         return None
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    return parse_article(url, response.text)
+
+def parse_article(url, html):
+    doc = parse_html(html)
 
     # removing unwanted stuffs 
-    for box in soup.find_all("div", class_="wpds-c-PJLV article-body type-story subtype-context-box"):
-        box.decompose()
+    for box in doc.select("div.wpds-c-PJLV.article-body.type-story.subtype-context-box"):
+        box.remove()
 
     # removing the footer
-    footer_div = soup.find("div", class_="wpds-c-iMBzTR article-footer")
+    footer_div = doc.select_one("div.wpds-c-iMBzTR.article-footer")
     if footer_div:
-        footer_div.decompose()
+        footer_div.remove()
 
     # title
-    title_tag = soup.find("h1")
-    title = title_tag.text.strip() if title_tag else "No title found"
+    title_tag = doc.select_one("h1")
+    title = title_tag.text().strip() if title_tag else "No title found"
 
     # subheadline
-    subheadline_tag = soup.find("p", {"data-qa": "subheadline"})
-    subheadline = subheadline_tag.text.strip() if subheadline_tag else "No subheadline found"
+    subheadline_tag = doc.select_one('p[data-qa="subheadline"]')
+    subheadline = subheadline_tag.text().strip() if subheadline_tag else "No subheadline found"
 
     # article body getting (primary method)
-    article_tag = soup.find("article", {"data-qa": "main"})
+    article_tag = doc.select_one('article[data-qa="main"]')
     article_text = ""
     if article_tag:
         paragraphs = []
-        for p in article_tag.find_all("p"):
-            if p.find("a") and not p.get_text(strip=True).replace(p.a.text.strip(), '').strip():
+        for p in article_tag.select("p"):
+            link = p.select_one("a")
+            if link and not p.text(strip=True).replace(link.text().strip(), '').strip():
                 continue
-            text = p.get_text(strip=True)
+            text = p.text(strip=True)
             if text:
                 paragraphs.append(text)
         article_text = "\n".join(paragraphs)
@@ -52,36 +64,36 @@ def scrape_article(url, cookies, headers):
      paragraphs = []
 
 
-    for section in soup.find_all("div", class_="wpds-c-PJLV article-body type-text grid-center grid-body"):
-        for p in section.find_all("p", {"data-apitype": "text"}):
-            text = p.get_text(strip=True)
+    for section in doc.select("div.wpds-c-PJLV.article-body.type-text.grid-center.grid-body"):
+        for p in section.select('p[data-apitype="text"]'):
+            text = p.text(strip=True)
             if text:
                 paragraphs.append(text)
 
 
     if not paragraphs:
-        for p in soup.find_all("p", {"data-component": "Text"}):
-            text = p.get_text(strip=True)
+        for p in doc.select('p[data-component="Text"]'):
+            text = p.text(strip=True)
             if text:
                 paragraphs.append(text)
 
     article_text = "\n".join(paragraphs) if paragraphs else "No article content found."
 
     # datetime
-    time_tag = soup.find("time", {"data-testid": "updated-and-published"})
+    time_tag = doc.select_one('time[data-testid="updated-and-published"]')
     if time_tag and time_tag.has_attr("datetime"):
-        datetime_value = time_tag["datetime"]
+        datetime_value = time_tag.get("datetime")
     else:
-        time_tag = soup.find("time", datetime=True)
-        datetime_value = time_tag["datetime"] if time_tag else "No datetime found"
+        time_tag = doc.select_one("time[datetime]")
+        datetime_value = time_tag.get("datetime") if time_tag else "No datetime found"
 
     # imageurl
    # imageurl
-    image_tag = soup.find("img")
+    image_tag = doc.select_one("img")
     if image_tag:
         if image_tag.get("srcset"):
             # Get the highest resolution image from srcset
-            srcset_urls = [u.split()[0] for u in image_tag["srcset"].split(",")]
+            srcset_urls = [u.split()[0] for u in image_tag.get("srcset").split(",")]
             image_url = srcset_urls[-1] if srcset_urls else image_tag.get("src", "No image found")
         else:
             image_url = image_tag.get("src", "No image found")
@@ -98,7 +110,35 @@ def scrape_article(url, cookies, headers):
         "article_text": article_text
     }
 
+# WaPo pages are Next.js apps with the Arc article document in __NEXT_DATA__;
+# returns None when the page doesn't carry it
+def parse_article_json(url, html):
+    article = dig(script_json(html, "__NEXT_DATA__"), "props", "pageProps", "globalContent")
+    if not isinstance(article, dict):
+        return None
+
+    # only "text" elements are body paragraphs, context boxes and footers are other types
+    paragraphs = element_texts(article.get("content_elements"))
+
+    return {
+        "url": url,
+        "datetime": article.get("display_date") or article.get("first_publish_date"),
+        "title": dig(article, "headlines", "basic"),
+        "subheadline": dig(article, "subheadlines", "basic"),
+        "image_url": dig(article, "promo_items", "basic", "url"),
+        "article_text": "\n".join(paragraphs)
+    }
+
+def parse_article_embedded(url, html):
+    article_data = parse_article_json(url, html)
+    if not article_data:
+        return parse_article(url, html)
+    return with_fallback(article_data, lambda: parse_article(url, html))
+
 def main():
+    args = embedded_args(scraper_args("Scrape Washington Post articles listed in washington_post.txt")).parse_args()
+    parse = parse_article_embedded if args.embedded_json else parse_article
+
     # using cookis
     cookies = load_browser_cookies("cookie.json")
 
@@ -111,23 +151,30 @@ def main():
     with open("washington_post.txt", "r") as f:
         urls = [line.strip() for line in f if line.strip()]
 
-    all_articles = []
-    for url in urls:
-        print(f" Scraping {url} ...")
-        article_data = scrape_article(url, cookies, headers)
-        if article_data:
-            all_articles.append(article_data)
-
-        # random delays to prevent anti bot script getting trigglerd
-        delay = random.uniform(1, 3)
-        print(f" Sleeping for {delay:.2f} seconds...")
-        time.sleep(delay)
-
-    # saving output to json
-    with open("articles_output.json", "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=4)
-
-    print(f" Done Scraped {len(all_articles)} articles saved to articles_output.json")
+    # per host rate limit with jitter to prevent anti bot script getting trigglerd
+    limiter = DomainRateLimiter(rate=0.5, jitter=1.0)
+
+    # saving output to json, or line by line with --jsonl
+    checkpoint = open_checkpoint("articles_output.json", jsonl=args.jsonl, resume=args.resume)
+    todo = checkpoint.pending(urls)
+    if args.resume:
+        print(f"Resuming: {len(urls) - len(todo)} URLs already done")
+
+    with checkpoint, open_output("articles_output.json", jsonl=args.jsonl, indent=4,
+                                 fsync_every=args.fsync_every, order=urls, resume=args.resume) as output:
+        def handle_response(url, status, html):
+            if status != 200:
+                print(f" Failed to fetch {url}. Status code: {status}")
+                checkpoint.mark_failed(url, f"HTTP {status}")
+                return
+            print(f" Scraped {url}")
+            checkpoint.mark_done(url, output.write(parse(url, html)))
+
+        print(f" Scraping {len(todo)} URLs ...")
+        fetch_all(todo, handle_response, cookies=cookies, headers=headers, limiter=limiter,
+                  cache=open_http_cache(args))
+
+    print(f" Done Scraped {output.count} articles saved to {output.path}")
 
 if __name__ == "__main__":
     main()